@@ -10,11 +10,9 @@
 - qualification_summary（資格要求）
 """
 
-import sqlite3
-import time
 from pathlib import Path
 import logging
-from monitor import get_tender_detail, DB_PATH
+from monitor import close_db, fetch_tender_details, log_connection_stats, get_db
 
 # 設置日誌
 logging.basicConfig(
@@ -34,7 +32,7 @@ def backfill_tender_details(limit=None):
     logger.info("開始回填標案詳細資訊...")
 
     # 1. 查詢需要回填的標案
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_db() as conn:
         cursor = conn.cursor()
         query = """
             SELECT unit_id, job_number, brief, pk_pms_main
@@ -57,52 +55,48 @@ def backfill_tender_details(limit=None):
         logger.info("沒有需要回填的標案")
         return
 
-    # 2. 逐一回填
+    # 2. 並行查詢詳細資料（共用自適應限速，不需逐筆等待）
+    details = fetch_tender_details(
+        [(unit_id, job_number) for unit_id, job_number, _, _ in tenders_to_update]
+    )
+
+    # 3. 逐一整理回填資料
     success_count = 0
     failed_count = 0
+    updates = []
 
     for idx, (unit_id, job_number, brief, pk_pms_main) in enumerate(tenders_to_update, 1):
         logger.info(f"[{idx}/{total}] 處理: {brief[:50]}...")
 
-        try:
-            # 呼叫 get_tender_detail 取得完整資訊
-            result = get_tender_detail(unit_id, job_number)
-
-            if result:
-                budget, pk_pms_main_new, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
-
-                # 更新資料庫
-                with sqlite3.connect(DB_PATH) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE tenders
-                        SET url = ?,
-                            unit_name = ?,
-                            award_type = ?,
-                            is_electronic = ?,
-                            requires_deposit = ?,
-                            contract_duration = ?,
-                            qualification_summary = ?
-                        WHERE unit_id = ? AND job_number = ?
-                    """, (url, unit_name, award_type, is_electronic, requires_deposit,
-                          contract_duration, qualification_summary, unit_id, job_number))
-                    conn.commit()
-
-                success_count += 1
-                logger.info(f"  ✓ 更新成功 - 機關: {unit_name[:20] if unit_name else 'N/A'}..., 決標方式: {award_type or 'N/A'}")
-            else:
-                failed_count += 1
-                logger.warning(f"  ✗ 無法取得詳細資訊")
-
-            # 避免請求過快
-            time.sleep(0.5)
-
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"  ✗ 處理失敗: {e}")
-            continue
+        result = details.get((unit_id, job_number))
+
+        if result:
+            budget, pk_pms_main_new, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
 
-    # 3. 輸出統計
+            updates.append((url, unit_name, award_type, is_electronic, requires_deposit,
+                            contract_duration, qualification_summary, unit_id, job_number))
+
+            success_count += 1
+            logger.info(f"  ✓ 更新成功 - 機關: {unit_name[:20] if unit_name else 'N/A'}..., 決標方式: {award_type or 'N/A'}")
+        else:
+            failed_count += 1
+            logger.warning(f"  ✗ 無法取得詳細資訊")
+
+    # 單一交易批次更新資料庫
+    with get_db() as conn:
+        conn.executemany("""
+            UPDATE tenders
+            SET url = ?,
+                unit_name = ?,
+                award_type = ?,
+                is_electronic = ?,
+                requires_deposit = ?,
+                contract_duration = ?,
+                qualification_summary = ?
+            WHERE unit_id = ? AND job_number = ?
+        """, updates)
+
+    # 4. 輸出統計
     logger.info("\n" + "="*60)
     logger.info(f"回填完成！")
     logger.info(f"成功: {success_count} 筆")
@@ -110,6 +104,8 @@ def backfill_tender_details(limit=None):
     logger.info(f"總計: {total} 筆")
     logger.info("="*60)
 
+    log_connection_stats()
+
 
 if __name__ == "__main__":
     import sys
@@ -125,3 +121,5 @@ if __name__ == "__main__":
             sys.exit(1)
 
     backfill_tender_details(limit=limit)
+    # 把 WAL 寫回主資料庫檔
+    close_db()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+標題過濾效能比較
+- 舊版：每個關鍵字各做一次 `keyword in title`
+- 新版：Aho-Corasick 自動機單次掃描（monitor.is_candidate_title）
+- 驗證兩者判斷結果完全相同，並輸出每秒處理筆數
+
+標題來源：優先使用 cache/listbydate/ 的完整每日列表，沒有快取時改用 reports/ 內的標題
+"""
+
+import gzip
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from monitor import (
+    HARD_EXCLUDE, MUST_INCLUDE_KEYWORDS, SYSTEM_KEYWORDS, KEYWORDS_EXCLUDE,
+    LISTBYDATE_CACHE_DIR, is_candidate_title
+)
+
+
+def legacy_is_candidate_title(title):
+    """舊版兩階段過濾（逐一子字串掃描）"""
+    if any(hard_ex in title for hard_ex in HARD_EXCLUDE):
+        return False
+    if any(kw in title for kw in MUST_INCLUDE_KEYWORDS):
+        return True
+    if any(kw in title for kw in SYSTEM_KEYWORDS):
+        return not any(ex_kw in title for ex_kw in KEYWORDS_EXCLUDE)
+    return False
+
+
+def load_titles():
+    """讀取測試用標題"""
+    titles = []
+    for cache_file in sorted(LISTBYDATE_CACHE_DIR.glob("*.json.gz")):
+        with gzip.open(cache_file, 'rt', encoding='utf-8') as f:
+            entry = json.load(f)
+        titles.extend(r.get('brief', {}).get('title', '') for r in entry.get('records', []))
+
+    if titles:
+        return titles, f"{LISTBYDATE_CACHE_DIR}（{len(titles):,} 筆）"
+
+    pattern = re.compile(r"^### \d+\. (.+)$|^\| ([^|]+?) \| \$")
+    for report_file in sorted(Path("reports").glob("*.md")):
+        for line in report_file.read_text(encoding='utf-8').splitlines():
+            match = pattern.match(line)
+            if match:
+                titles.append((match.group(1) or match.group(2)).strip())
+    return titles, f"reports/（{len(titles):,} 筆）"
+
+
+def bench(func, titles, rounds):
+    """回傳 (每秒筆數, 判斷結果)"""
+    results = [func(t) for t in titles]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for t in titles:
+            func(t)
+    elapsed = time.perf_counter() - started
+    return len(titles) * rounds / elapsed, results
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    titles, source = load_titles()
+    if not titles:
+        print("找不到測試標題（需要 cache/listbydate/ 或 reports/）")
+        sys.exit(1)
+
+    print(f"標題來源：{source}，重複 {rounds} 輪")
+
+    legacy_rate, legacy_results = bench(legacy_is_candidate_title, titles, rounds)
+    matcher_rate, matcher_results = bench(is_candidate_title, titles, rounds)
+
+    mismatches = sum(1 for a, b in zip(legacy_results, matcher_results) if a != b)
+
+    print(f"舊版子字串掃描：{legacy_rate:,.0f} 筆/秒")
+    print(f"Aho-Corasick  ：{matcher_rate:,.0f} 筆/秒（{matcher_rate / legacy_rate:.1f}x）")
+    print(f"判斷結果不一致：{mismatches} 筆")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
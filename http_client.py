@@ -0,0 +1,193 @@
+"""
+共用 HTTP 用戶端
+- 全程式共用一個 requests.Session，以 keep-alive 連線池重用 TCP/TLS 連線
+- 可調整連線池數量、每主機連線上限
+- 統計連線重用與新建次數
+- 自適應速率限制器（AIMD token bucket）
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ===== 連線池配置 =====
+
+# 快取的主機連線池數量（PCC API 代理、LINE API 等，每個主機一個池）
+POOL_CONNECTIONS = 10
+
+# 每個主機最多保留的連線數（需 >= 最大並行請求數，連線才能全部重用）
+POOL_MAXSIZE = 8
+
+# 每主機連線達上限時等待可用連線，而非另開用完即丟的臨時連線
+POOL_BLOCK = True
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """取得共用 Session（首次呼叫時建立）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                pool_block=POOL_BLOCK
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get(url, **kwargs):
+    """以共用連線池發送 GET 請求（參數同 requests.get）"""
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """以共用連線池發送 POST 請求（參數同 requests.post）"""
+    return get_session().post(url, **kwargs)
+
+
+def connection_stats():
+    """
+    統計共用連線池的連線使用狀況
+
+    Returns:
+        dict: {
+            'requests': 已發送請求數,
+            'new_connections': 新建連線數（每次都需完整 TCP+TLS 握手）,
+            'reused': 重用既有連線的請求數
+        }
+    """
+    stats = {'requests': 0, 'new_connections': 0, 'reused': 0}
+
+    with _session_lock:
+        session = _session
+    if session is None:
+        return stats
+
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['requests'] += pool.num_requests
+            stats['new_connections'] += pool.num_connections
+
+    stats['reused'] = max(0, stats['requests'] - stats['new_connections'])
+    return stats
+
+
+def close():
+    """關閉共用 Session 並釋放所有連線"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# ===== 自適應速率限制 =====
+
+class AdaptiveRateLimiter:
+    """
+    AIMD（加性增、乘性減）token bucket 速率限制器，可跨執行緒共用
+
+    - acquire()：取得一個請求配額，配額不足時等待
+    - on_success()：請求成功，速率加上 increase（不超過 max_rate）
+    - on_throttle()：遇到 429 或逾時，速率乘上 decrease（不低於 min_rate），
+      並可依 Retry-After 暫停所有請求
+
+    同一波壅塞常讓多個並行請求同時失敗，因此距上次降速未滿一個請求間隔時不再重複降速。
+    """
+
+    def __init__(self, rate, min_rate, max_rate, increase, decrease, burst=1):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.burst = float(burst)
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """取得一個請求配額（必要時等待）"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """請求成功：加性提高速率，回傳目前速率"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            return self.rate
+
+    def on_throttle(self, retry_after=None):
+        """
+        請求被限流或逾時：乘性降低速率，回傳目前速率
+
+        Args:
+            retry_after: 伺服器要求的等待秒數，期間暫停所有請求
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now - self._last_decrease >= 1 / self.rate:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            return self.rate
+
+
+def parse_retry_after(value):
+    """解析 Retry-After header（秒數或 HTTP 日期），回傳等待秒數，無法解析時回傳 None"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
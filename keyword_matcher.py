@@ -0,0 +1,92 @@
+"""
+多關鍵字比對器（Aho-Corasick）
+- 將多組關鍵字編譯成單一自動機，一次掃描標題即可得知命中哪些關鍵字組
+- 取代逐一 `keyword in title` 的多次子字串掃描
+"""
+
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 多組關鍵字比對器
+
+    建構時傳入 {組名: 關鍵字列表}，groups_in(text) 回傳 text 中命中的組名集合，
+    結果與 `any(kw in text for kw in 關鍵字列表)` 逐組判斷相同（區分大小寫）。
+
+    轉移表只保存非根節點的轉移（含沿失敗鏈繼承的轉移），查不到時改查根節點，
+    等同完整 DFA 但不必為每個狀態複製整個字母表。
+    """
+
+    def __init__(self, groups):
+        self.group_names = list(groups)
+        group_bits = {name: 1 << i for i, name in enumerate(self.group_names)}
+
+        # 1. 建立 trie
+        goto = [{}]
+        output = [0]
+        for name, keywords in groups.items():
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                state = 0
+                for ch in keyword:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        output.append(0)
+                    state = nxt
+                output[state] |= group_bits[name]
+
+        # 2. BFS 計算失敗連結，合併輸出與沿失敗鏈繼承的轉移
+        root = goto[0]
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = {}
+        queue = deque(root.values())
+
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+
+            # 失敗狀態深度較淺，已先處理完成
+            delta[state] = {**delta[f], **goto[state]}
+            output[state] |= output[f]
+
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[f].get(ch) or root.get(ch, 0)
+                queue.append(nxt)
+
+        self._root = goto[0]
+        self._delta = delta
+        self._output = output
+        self._mask_names = {}
+
+    def match_mask(self, text):
+        """掃描 text，回傳命中組別的位元遮罩（第 i 組對應 1 << i）"""
+        root_get = self._root.get
+        delta = self._delta
+        output = self._output
+
+        state = 0
+        mask = 0
+        for ch in text:
+            nxt = delta[state].get(ch)
+            if nxt is None:
+                nxt = root_get(ch, 0)
+            state = nxt
+            mask |= output[state]
+        return mask
+
+    def groups_in(self, text):
+        """掃描 text，回傳命中的組名集合（frozenset）"""
+        mask = self.match_mask(text)
+        names = self._mask_names.get(mask)
+        if names is None:
+            names = frozenset(
+                name for i, name in enumerate(self.group_names) if mask & (1 << i)
+            )
+            self._mask_names[mask] = names
+        return names
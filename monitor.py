@@ -13,12 +13,30 @@ import sys
 import os
 import re
 import time
+import queue
+import signal
 import logging
 import logging.handlers
 import argparse
+import threading
+import atexit
+import calendar
+import json
+import gzip
+import heapq
+import itertools
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
 
+import http_client
+import report_formats
+from keyword_matcher import KeywordMatcher
+from tender_scoring import SCORING_VERSION, analyze_tender
+
 # ===== 日誌系統設定 =====
 
 # 建立 logs 目錄
@@ -167,6 +185,14 @@ KEYWORDS_EXCLUDE = [
     "網站架設", "線上網站",
 ]
 
+# 標題過濾自動機：所有關鍵字列表編譯成單一 Aho-Corasick 自動機，每個標題只掃描一次
+TITLE_MATCHER = KeywordMatcher({
+    'hard_exclude': HARD_EXCLUDE,
+    'must_include': MUST_INCLUDE_KEYWORDS,
+    'system': SYSTEM_KEYWORDS,
+    'exclude': KEYWORDS_EXCLUDE,
+})
+
 # LINE Messaging API 配置（從環境變數讀取）
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN", "")
 LINE_USER_ID = os.getenv("LINE_USER_ID", "")
@@ -174,128 +200,563 @@ LINE_USER_ID = os.getenv("LINE_USER_ID", "")
 # 資料庫路徑
 DB_PATH = "tenders.db"
 
-# API 請求間隔（秒）
+# /listbydate 回應快取目錄（與資料庫同目錄，gzip 壓縮 JSON）
+LISTBYDATE_CACHE_DIR = Path(DB_PATH).parent / "cache" / "listbydate"
+
+# 快取新鮮度：今天一律重新抓取；快取在該日期後 N 天內的需重新驗證，
+# 經過此期間驗證過的舊日期資料視為不再變動，直接使用快取
+LISTBYDATE_REVALIDATE_DAYS = 2
+
+# 快取保留天數（超過即刪除）
+LISTBYDATE_CACHE_KEEP_DAYS = 30
+
+# 標案詳細資料快取（tender_detail_cache 表）有效時數與保留天數
+DETAIL_CACHE_TTL_HOURS = 72
+DETAIL_CACHE_KEEP_DAYS = 90
+
+# API 初始請求間隔（秒）：所有執行緒共用，實際速率由自適應限速器調整
 API_DELAY = 0.5
 
+# 自適應限速（AIMD）：成功時每次加 API_RATE_INCREASE 次/秒，
+# 429 或逾時時乘以 API_RATE_DECREASE，速率介於 API_RATE_MIN ~ API_RATE_MAX 次/秒
+API_RATE_MIN = 0.2
+API_RATE_MAX = 8.0
+API_RATE_INCREASE = 0.05
+API_RATE_DECREASE = 0.5
+
+# 429 / 逾時的最大重試次數
+API_MAX_RETRIES = 3
+
+# 詳細資料並行查詢數（同時進行中的 /tender 請求上限）
+DETAIL_CONCURRENCY = 4
+
+# 每日列表並行查詢數（同時進行中的 /listbydate 請求上限）
+LISTBYDATE_CONCURRENCY = 4
+
 # API 超時設定（秒）
 API_TIMEOUT = 15  # 從 30 秒改為 15 秒
 
+# SQLite 連線設定：WAL 讓同步與查詢工具可同時讀寫，等待鎖定最多 DB_BUSY_TIMEOUT 秒
+DB_BUSY_TIMEOUT = 30
+DB_CACHE_SIZE_KB = 20000           # 頁面快取（KB）
+DB_MMAP_SIZE = 256 * 1024 * 1024   # 記憶體映射讀取上限（bytes）
 
-# ===== 資料庫初始化 =====
+# 新標案批次提交筆數
+SAVE_BATCH_SIZE = 50
 
-def init_db():
-    """初始化 SQLite 資料庫"""
+# 同步管線各階段之間的佇列上限（下游較慢時上游暫停，限制記憶體與進行中的請求數）
+PIPELINE_QUEUE_SIZE = 32
+PIPELINE_POLL_INTERVAL = 0.2  # 等待佇列時檢查取消的間隔（秒）
+
+# --resume 只接續此時數內開始的未完成同步（每日排程中斷後，隔天仍可接續）
+SYNC_RESUME_MAX_AGE_HOURS = 48
+
+# --time-budget：預留給進行中請求、歸檔與統計的秒數（預算扣除此值後不再送出新的詳細資料查詢）
+TIME_BUDGET_RESERVE = API_TIMEOUT * 2
+
+# --time-budget：新案重新排序的視窗筆數（超過時先送出最急迫者，不必等列表全部掃描完）
+PRIORITY_WINDOW = 64
+
+# 詳細資料查詢的急迫程度（數字越小越優先）：公告類型關鍵字，未列出者排最後
+NOTICE_TYPE_URGENCY = [
+    ("報價單", 0),   # 公開取得報價單或企劃書：等標期最短
+    ("更正", 1),     # 更正公告：多半已接近截止或截止日有異動
+    ("招標", 2),
+]
+
+# 標題分類的急迫程度（同 classify_tender 優先級：維護案 > 開發案 > 其他）
+TENDER_TYPE_URGENCY = {'maintenance': 0, 'development': 1}
+
+# 常駐模式（--mode daemon）排程預設值，可用同名環境變數覆寫（啟動常駐模式時才解析，見 load_daemon_settings）；
+# 間隔設為 0 或時間留空即停用該工作
+DAEMON_SYNC_INTERVAL_HOURS = 12
+DAEMON_POLL_INTERVAL_MINUTES = 120
+DAEMON_REPORT_TIME = "20:00"  # 每天生成日報的時間（HH:MM，本機時區）
+
+# 日報輸出格式（可用 --formats 或環境變數 REPORT_FORMATS 覆寫，格式見 report_formats.EMITTERS）
+REPORT_FORMATS = [fmt.strip() for fmt in os.getenv("REPORT_FORMATS", "md,html,json").split(",") if fmt.strip()]
+
+
+# ===== 資料庫連線 =====
+
+# 每個執行緒一條長駐連線（sqlite3 連線不可跨執行緒共用）
+_db_local = threading.local()
+
+
+def connect_db(path=DB_PATH, check_same_thread=True):
+    """建立 SQLite 連線並套用 WAL 與效能 PRAGMA"""
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    # INSERT OR REPLACE 取代舊列時也觸發 DELETE 觸發器，全文檢索索引才不會殘留舊資料
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
+
+
+def get_db():
+    """
+    取得目前執行緒的長駐資料庫連線（首次呼叫時建立）
+
+    以 `with get_db() as conn:` 包住一組操作即為一個交易，結束時自動提交（例外時回滾）。
+    """
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = connect_db()
+        _db_local.conn = conn
+    return conn
+
+
+def close_db(checkpoint=True):
+    """提交並關閉目前執行緒的連線；checkpoint=True 時同時把 WAL 內容寫回主資料庫檔"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        return
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
+        conn.commit()
+        if checkpoint:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except sqlite3.Error as e:
+        logger.warning(f"資料庫檢查點失敗: {e}")
+    finally:
+        conn.close()
+        _db_local.conn = None
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tenders (
-                    unit_id TEXT,
-                    job_number TEXT,
-                    brief TEXT,
-                    unit_name TEXT,
-                    budget INTEGER,
-                    pk_pms_main TEXT,
-                    deadline TEXT,
-                    url TEXT,
-                    date_added TEXT,
-                    notified INTEGER DEFAULT 0,
-                    status TEXT,
-                    publish_date TEXT,
-                    last_checked TEXT,
-                    last_status_change TEXT,
-                    PRIMARY KEY (unit_id, job_number)
-                )
-            """)
 
-            # 建立歷史歸檔表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tenders_archive (
-                    unit_id TEXT,
-                    job_number TEXT,
-                    brief TEXT,
-                    unit_name TEXT,
-                    budget INTEGER,
-                    pk_pms_main TEXT,
-                    deadline TEXT,
-                    date_added TEXT,
-                    notified INTEGER DEFAULT 0,
-                    status TEXT,
-                    publish_date TEXT,
-                    last_checked TEXT,
-                    last_status_change TEXT,
-                    archived_at TEXT,
-                    archive_reason TEXT,
-                    PRIMARY KEY (unit_id, job_number)
-                )
-            """)
+@contextmanager
+def db_thread_pool(max_workers):
+    """
+    建立工作會存取資料庫的執行緒池（with 區塊內使用）
 
-            # 升級現有資料庫：增加新欄位
-            # 處理舊版本沒有 url 欄位的問題
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN url TEXT")
-                logger.info("資料庫升級：新增 url 欄位")
-            except sqlite3.OperationalError:
-                pass  # 欄位已存在
+    每條工作執行緒啟動時建立並登記自己的連線，池關閉（所有工作結束）後逐一提交並關閉；
+    不做 WAL 檢查點，由主執行緒處理。
+    """
+    connections = []
+    lock = threading.Lock()
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN status TEXT")
-                logger.info("資料庫升級：新增 status 欄位")
-            except sqlite3.OperationalError:
-                pass  # 欄位已存在
+    def open_worker_db():
+        # 工作執行緒結束後由建立池的執行緒關閉，因此關閉同執行緒檢查
+        _db_local.conn = connect_db(check_same_thread=False)
+        with lock:
+            connections.append(_db_local.conn)
 
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), initializer=open_worker_db) as executor:
+            yield executor
+    finally:
+        for conn in connections:
             try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN publish_date TEXT")
-                logger.info("資料庫升級：新增 publish_date 欄位")
-            except sqlite3.OperationalError:
-                pass
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"工作執行緒連線提交失敗: {e}")
+            finally:
+                conn.close()
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN last_checked TEXT")
-                logger.info("資料庫升級：新增 last_checked 欄位")
-            except sqlite3.OperationalError:
-                pass
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN last_status_change TEXT")
-                logger.info("資料庫升級：新增 last_status_change 欄位")
-            except sqlite3.OperationalError:
-                pass
+# ===== 資料庫初始化 =====
 
-            # 新增決策關鍵欄位
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN award_type TEXT")
-                logger.info("資料庫升級：新增 award_type 欄位")
-            except sqlite3.OperationalError:
-                pass
+# 舊版逐次 ALTER TABLE 新增的 tenders 欄位（遷移步驟 1 補齊缺少者）
+LEGACY_TENDER_COLUMNS = [
+    ("url", "TEXT"),
+    ("status", "TEXT"),
+    ("publish_date", "TEXT"),
+    ("last_checked", "TEXT"),
+    ("last_status_change", "TEXT"),
+    ("award_type", "TEXT"),
+    ("is_electronic", "INTEGER DEFAULT 0"),
+    ("requires_deposit", "INTEGER DEFAULT 0"),
+    ("contract_duration", "TEXT"),
+    ("qualification_summary", "TEXT"),
+]
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN is_electronic INTEGER DEFAULT 0")
-                logger.info("資料庫升級：新增 is_electronic 欄位")
-            except sqlite3.OperationalError:
-                pass
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN requires_deposit INTEGER DEFAULT 0")
-                logger.info("資料庫升級：新增 requires_deposit 欄位")
-            except sqlite3.OperationalError:
-                pass
+def _table_columns(cursor, table):
+    """回傳資料表現有欄位名稱集合"""
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+def _migrate_base_schema(cursor):
+    """建立 tenders / tenders_archive，並補齊舊資料庫缺少的欄位"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tenders (
+            unit_id TEXT,
+            job_number TEXT,
+            brief TEXT,
+            unit_name TEXT,
+            budget INTEGER,
+            pk_pms_main TEXT,
+            deadline TEXT,
+            url TEXT,
+            date_added TEXT,
+            notified INTEGER DEFAULT 0,
+            status TEXT,
+            publish_date TEXT,
+            last_checked TEXT,
+            last_status_change TEXT,
+            PRIMARY KEY (unit_id, job_number)
+        )
+    """)
+
+    # 建立歷史歸檔表
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tenders_archive (
+            unit_id TEXT,
+            job_number TEXT,
+            brief TEXT,
+            unit_name TEXT,
+            budget INTEGER,
+            pk_pms_main TEXT,
+            deadline TEXT,
+            date_added TEXT,
+            notified INTEGER DEFAULT 0,
+            status TEXT,
+            publish_date TEXT,
+            last_checked TEXT,
+            last_status_change TEXT,
+            archived_at TEXT,
+            archive_reason TEXT,
+            PRIMARY KEY (unit_id, job_number)
+        )
+    """)
+
+    # 在 user_version 之前建立的資料庫可能缺少部分欄位
+    existing = _table_columns(cursor, "tenders")
+    for column, column_type in LEGACY_TENDER_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE tenders ADD COLUMN {column} {column_type}")
+            logger.info(f"資料庫升級：新增 {column} 欄位")
+
+
+def _migrate_detail_cache(cursor):
+    """建立標案詳細資料快取表（壓縮的原始 /tender 回應）"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tender_detail_cache (
+            unit_id TEXT,
+            job_number TEXT,
+            payload BLOB,
+            fetched_at TEXT,
+            PRIMARY KEY (unit_id, job_number)
+        )
+    """)
+
+
+def _migrate_rejections(cursor):
+    """建立淘汰候選表（預算/截止日期不符，列表公告未變更前不再查詢詳細資料）"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tender_rejections (
+            unit_id TEXT,
+            job_number TEXT,
+            reason TEXT,
+            notice_type TEXT,
+            publish_date TEXT,
+            rejected_at TEXT,
+            PRIMARY KEY (unit_id, job_number)
+        )
+    """)
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN contract_duration TEXT")
-                logger.info("資料庫升級：新增 contract_duration 欄位")
-            except sqlite3.OperationalError:
-                pass
 
-            try:
-                cursor.execute("ALTER TABLE tenders ADD COLUMN qualification_summary TEXT")
-                logger.info("資料庫升級：新增 qualification_summary 欄位")
-            except sqlite3.OperationalError:
-                pass
+def _migrate_cleanup_indexes(cursor):
+    """建立清理舊資料用的索引（cleanup_old_tenders、prune_tender_detail_cache）"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_date_added ON tenders(date_added)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_detail_cache_fetched_at ON tender_detail_cache(fetched_at)"
+    )
 
-            conn.commit()
-            logger.debug("資料庫初始化成功")
+
+def _migrate_epoch_columns(cursor):
+    """
+    新增整數時間欄位（虛擬生成欄位）與對應索引
+
+    *_ts = strftime('%s', 文字時間)，以文字時間本身（台灣時間）換算，不做時區轉換，
+    查詢端以 to_epoch() 換算比較基準。既有資料自動生效，不需回填。
+    """
+    for table, column in (("tenders", "deadline"), ("tenders", "date_added"),
+                          ("tenders_archive", "archived_at")):
+        cursor.execute(f"""
+            ALTER TABLE {table} ADD COLUMN {column}_ts INTEGER
+            GENERATED ALWAYS AS (CAST(strftime('%s', {column}) AS INTEGER)) VIRTUAL
+        """)
+
+    # report_mode 活躍標案：deadline_ts 範圍 + budget 排序
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_deadline_ts ON tenders(deadline_ts, budget)")
+    # 今日新增統計、cleanup_old_tenders、query_tenders（日期 + 預算 + 截止日期）
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tenders_date_added_ts ON tenders(date_added_ts, budget, deadline_ts)"
+    )
+    # report_mode 今日歸檔（覆蓋索引）
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_archive_archived_at_ts
+        ON tenders_archive(archived_at_ts, budget, brief, archive_reason)
+    """)
+    # 已由 idx_tenders_date_added_ts 取代
+    cursor.execute("DROP INDEX IF EXISTS idx_tenders_date_added")
+
+
+# 全文檢索索引來源：(資料表, rowid 奇偶位元)
+# tender_search.rowid = 來源 rowid * 2 + 奇偶位元，現行與歸檔標案共用同一索引（bm25 分數可互相比較）
+SEARCH_SOURCES = [("tenders", 0), ("tenders_archive", 1)]
+
+
+def rebuild_search_index(cursor):
+    """
+    依 tenders / tenders_archive 重建 tender_search 全文檢索索引
+
+    索引以來源 rowid 對應，執行 VACUUM（可能重新編號 rowid）後需重建。
+    """
+    cursor.execute("DELETE FROM tender_search")
+    for table, parity in SEARCH_SOURCES:
+        cursor.execute(f"""
+            INSERT INTO tender_search (rowid, brief, unit_name, qualification_summary)
+            SELECT rowid * 2 + {parity}, brief, unit_name, qualification_summary FROM {table}
+        """)
+
+
+def _migrate_search_index(cursor):
+    """
+    建立 FTS5 全文檢索索引（trigram 分詞，中文標題可直接以子字串查詢）
+
+    涵蓋現行與歸檔標案的 brief、unit_name、qualification_summary，由觸發器維持同步。
+    歸檔表同時補上 qualification_summary 與 *_ts 欄位，查詢時兩張表可套用相同條件。
+    """
+    cursor.execute("ALTER TABLE tenders_archive ADD COLUMN qualification_summary TEXT")
+    for column in ("deadline", "date_added"):
+        cursor.execute(f"""
+            ALTER TABLE tenders_archive ADD COLUMN {column}_ts INTEGER
+            GENERATED ALWAYS AS (CAST(strftime('%s', {column}) AS INTEGER)) VIRTUAL
+        """)
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tender_search USING fts5(
+            brief, unit_name, qualification_summary,
+            tokenize = 'trigram'
+        )
+    """)
+
+    # INSERT OR REPLACE 刪除舊列時需開啟 recursive_triggers 才會觸發 DELETE 觸發器（見 connect_db）
+    for table, parity in SEARCH_SOURCES:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO tender_search (rowid, brief, unit_name, qualification_summary)
+                VALUES (new.rowid * 2 + {parity}, new.brief, new.unit_name, new.qualification_summary);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM tender_search WHERE rowid = old.rowid * 2 + {parity};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_update
+            AFTER UPDATE OF brief, unit_name, qualification_summary ON {table} BEGIN
+                UPDATE tender_search
+                SET brief = new.brief, unit_name = new.unit_name,
+                    qualification_summary = new.qualification_summary
+                WHERE rowid = old.rowid * 2 + {parity};
+            END
+        """)
+
+    rebuild_search_index(cursor)
+
+
+def _migrate_daily_stats(cursor):
+    """新增標案分類欄位（同步時預先計算）與每日統計表"""
+    for column in ("tender_type", "priority", "exclusion_reason"):
+        cursor.execute(f"ALTER TABLE tenders ADD COLUMN {column} TEXT")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            stat_date TEXT PRIMARY KEY,
+            new_count INTEGER,
+            removed_count INTEGER,
+            active_count INTEGER,
+            open_count INTEGER,
+            high_priority_count INTEGER,
+            attention_count INTEGER,
+            other_count INTEGER,
+            synced_at TEXT
+        )
+    """)
+
+
+# 歸檔時一併保留的詳細欄位（重新生成歷史日報用）
+ARCHIVE_DETAIL_COLUMNS = [
+    ("url", "TEXT"),
+    ("award_type", "TEXT"),
+    ("is_electronic", "INTEGER DEFAULT 0"),
+    ("requires_deposit", "INTEGER DEFAULT 0"),
+    ("contract_duration", "TEXT"),
+]
+
+
+def _migrate_archive_details(cursor):
+    """歸檔表補上 url 等詳細欄位，歷史日報才能還原完整內容"""
+    for column, column_type in ARCHIVE_DETAIL_COLUMNS:
+        cursor.execute(f"ALTER TABLE tenders_archive ADD COLUMN {column} {column_type}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_date_added_ts ON tenders_archive(date_added_ts)")
+
+
+# 同步時預先計算的推薦評分欄位（見 tender_scoring.analyze_tender）
+SCORE_COLUMNS = [
+    ("score", "REAL"),
+    ("difficulty", "INTEGER"),
+    ("competition", "INTEGER"),
+    ("scoring_version", "INTEGER"),
+]
+
+
+def _migrate_tender_scores(cursor):
+    """新增推薦評分欄位與索引（--min-score 篩選直接走索引）"""
+    for table in ("tenders", "tenders_archive"):
+        for column, column_type in SCORE_COLUMNS:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_score ON tenders(score, deadline_ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_scoring_version ON tenders(scoring_version)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_score ON tenders_archive(score)")
+
+
+def _migrate_sync_runs(cursor):
+    """新增同步執行紀錄與檢查點表（中斷後可用 --resume 續跑）"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_date TEXT,
+            days_to_search INTEGER,
+            status TEXT,
+            started_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT
+        )
+    """)
+    # 已完成列表掃描的日期
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_run_days (
+            run_id INTEGER,
+            list_date TEXT,
+            PRIMARY KEY (run_id, list_date)
+        )
+    """)
+    # 各日通過關鍵字過濾的候選標案（續跑時不需重新下載列表）
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_run_candidates (
+            run_id INTEGER,
+            list_date TEXT,
+            unit_id TEXT,
+            job_number TEXT,
+            brief TEXT,
+            unit_name TEXT,
+            status TEXT,
+            publish_date TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_run_candidates ON sync_run_candidates(run_id, list_date)")
+    # 本次執行已儲存的新案（已由 tenders.notified 取代，見 _migrate_notified_flags / _migrate_drop_sync_run_saved）
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_run_saved (
+            run_id INTEGER,
+            unit_id TEXT,
+            job_number TEXT,
+            PRIMARY KEY (run_id, unit_id, job_number)
+        )
+    """)
+
+
+def _migrate_deferred_details(cursor):
+    """新增因 --time-budget 用盡而延後查詢的新案表（下次同步優先處理）"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deferred_details (
+            unit_id TEXT,
+            job_number TEXT,
+            brief TEXT,
+            publish_date TEXT,
+            deferred_at TEXT,
+            PRIMARY KEY (unit_id, job_number)
+        )
+    """)
+
+
+def _migrate_classification_version(cursor):
+    """新增分類版本欄位，CLASSIFICATION_VERSION 變更時重新分類（既有分類視為過期）"""
+    cursor.execute("ALTER TABLE tenders ADD COLUMN classification_version INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_classification_version ON tenders(classification_version)")
+
+
+def _migrate_notified_flags(cursor):
+    """
+    改以 tenders.notified 追蹤尚未通知的新案（列表掃描未完成時也照常通知）
+
+    既有標案已於先前的同步通知過，全部標記為已通知；未完成同步已儲存、尚未通知的新案除外。
+    """
+    cursor.execute("""
+        UPDATE tenders SET notified = 1
+        WHERE (unit_id, job_number) NOT IN (
+            SELECT r.unit_id, r.job_number
+            FROM sync_run_saved r JOIN sync_runs s ON s.run_id = r.run_id
+            WHERE s.status = 'running'
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_notified ON tenders(notified)")
+
+
+def _migrate_drop_sync_run_saved(cursor):
+    """移除 sync_run_saved（通知改由 tenders.notified 追蹤，內容已於上一步驟轉入）"""
+    cursor.execute("DROP TABLE IF EXISTS sync_run_saved")
+
+
+# 資料庫遷移步驟：第 i 個步驟將 PRAGMA user_version 由 i 升至 i + 1
+# 只能在尾端新增步驟，不可修改或重排已發布的步驟
+MIGRATIONS = [
+    _migrate_base_schema,
+    _migrate_detail_cache,
+    _migrate_rejections,
+    _migrate_cleanup_indexes,
+    _migrate_epoch_columns,
+    _migrate_search_index,
+    _migrate_daily_stats,
+    _migrate_archive_details,
+    _migrate_tender_scores,
+    _migrate_sync_runs,
+    _migrate_deferred_details,
+    _migrate_classification_version,
+    _migrate_notified_flags,
+    _migrate_drop_sync_run_saved,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def to_epoch(dt):
+    """將 datetime 換算為與 *_ts 欄位相同基準的整數秒（視為 UTC，不做時區轉換）"""
+    return calendar.timegm(dt.timetuple())
+
+
+def init_db():
+    """
+    初始化 SQLite 資料庫
+
+    以 PRAGMA user_version 記錄已套用的遷移步驟，已是最新版本時只做一次版本查詢。
+    每個步驟與其版本號更新在同一交易內完成，失敗時整步回滾。
+    """
+    try:
+        conn = get_db()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            logger.debug(f"資料庫結構已是最新版本 (v{version})")
+            return
+
+        for step in range(version, SCHEMA_VERSION):
+            with conn:
+                cursor = conn.cursor()
+                # DDL 不會自動開啟交易，明確取得寫入鎖後再確認版本（避免兩個程序重複遷移）
+                cursor.execute("BEGIN IMMEDIATE")
+                if cursor.execute("PRAGMA user_version").fetchone()[0] != step:
+                    continue
+                MIGRATIONS[step](cursor)
+                cursor.execute(f"PRAGMA user_version = {step + 1}")
+            logger.info(f"資料庫遷移：v{step} → v{step + 1}（{MIGRATIONS[step].__name__}）")
+
+        logger.debug("資料庫初始化成功")
     except sqlite3.Error as e:
         logger.error(f"資料庫初始化失敗: {e}")
         raise
@@ -304,7 +765,7 @@ def init_db():
 def is_new_tender(unit_id, job_number):
     """檢查標案是否為新案"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT 1 FROM tenders WHERE unit_id = ? AND job_number = ? LIMIT 1",
@@ -318,29 +779,84 @@ def is_new_tender(unit_id, job_number):
         return True
 
 
-def save_tender(unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url,
-                 award_type='', is_electronic=0, requires_deposit=0, contract_duration='', qualification_summary=''):
-    """儲存標案到資料庫，返回是否成功"""
+def find_new_tender_keys(keys):
+    """
+    批次檢查新案：以單一連線、單一查詢找出尚未存在於資料庫的標案
+
+    候選 key 先寫入暫存表，再以 NOT EXISTS 對 tenders 主鍵索引查詢。
+
+    Args:
+        keys: (unit_id, job_number) 可迭代物件
+
+    Returns:
+        set: 新案的 (unit_id, job_number)
+    """
+    unique_keys = set(keys)
+    if not unique_keys:
+        return set()
+
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
             cursor.execute("""
-                INSERT INTO tenders (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url, date_added,
-                                     award_type, is_electronic, requires_deposit, contract_duration, qualification_summary)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url, now,
-                  award_type, is_electronic, requires_deposit, contract_duration, qualification_summary))
+                CREATE TEMP TABLE IF NOT EXISTS candidate_keys (
+                    unit_id TEXT,
+                    job_number TEXT,
+                    PRIMARY KEY (unit_id, job_number)
+                )
+            """)
+            cursor.execute("DELETE FROM candidate_keys")
+            cursor.executemany(
+                "INSERT INTO candidate_keys (unit_id, job_number) VALUES (?, ?)",
+                unique_keys
+            )
+            cursor.execute("""
+                SELECT c.unit_id, c.job_number
+                FROM candidate_keys c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM tenders t
+                    WHERE t.unit_id = c.unit_id AND t.job_number = c.job_number
+                )
+            """)
+            return set(cursor.fetchall())
+    except sqlite3.Error as e:
+        logger.error(f"資料庫查詢錯誤: {e}")
+        # 發生錯誤時，假設都是新案（寧可重複通知也不要漏掉）
+        return unique_keys
+
 
+def save_tender(unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url,
+                 award_type='', is_electronic=0, requires_deposit=0, contract_duration='', qualification_summary='',
+                 commit=True):
+    """
+    儲存標案到資料庫，返回是否成功
+
+    commit=False 時不提交，由呼叫端累積一批後再以 get_db().commit() 一次提交
+    """
+    conn = get_db()
+    try:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        conn.execute("""
+            INSERT INTO tenders (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url, date_added,
+                                 award_type, is_electronic, requires_deposit, contract_duration, qualification_summary)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, url, now,
+              award_type, is_electronic, requires_deposit, contract_duration, qualification_summary))
+
+        if commit:
             conn.commit()
-            logger.debug(f"標案已儲存: {brief[:40]}...")
-            return True
+        logger.debug(f"標案已儲存: {brief[:40]}...")
+        return True
     except sqlite3.IntegrityError:
         # 已存在（PRIMARY KEY 衝突），不是新標案
+        if commit:
+            conn.rollback()
         logger.debug(f"標案已存在: {unit_id}/{job_number}")
         return False
     except sqlite3.Error as e:
+        if commit:
+            conn.rollback()
         logger.error(f"儲存標案失敗: {e}")
         return False
 
@@ -348,14 +864,14 @@ def save_tender(unit_id, job_number, brief, unit_name, budget, pk_pms_main, dead
 def cleanup_old_tenders():
     """清理 3 個月前的舊標案資料"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
 
             # 計算 90 天前的日期
-            three_months_ago = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+            three_months_ago = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90)
 
             # 刪除舊資料
-            cursor.execute("DELETE FROM tenders WHERE date_added < ?", (three_months_ago,))
+            cursor.execute("DELETE FROM tenders WHERE date_added_ts < ?", (to_epoch(three_months_ago),))
             deleted_count = cursor.rowcount
 
             conn.commit()
@@ -369,6 +885,68 @@ def cleanup_old_tenders():
         return 0
 
 
+def load_rejections():
+    """
+    讀取淘汰候選紀錄
+
+    Returns:
+        dict: {(unit_id, job_number): (notice_type, publish_date)}
+    """
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT unit_id, job_number, notice_type, publish_date FROM tender_rejections")
+            return {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+    except sqlite3.Error as e:
+        logger.error(f"讀取淘汰紀錄失敗: {e}")
+        return {}
+
+
+def save_rejections(rejections):
+    """
+    批次記錄淘汰候選
+
+    Args:
+        rejections: [(unit_id, job_number, reason, notice_type, publish_date), ...]
+    """
+    if not rejections:
+        return
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with get_db() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO tender_rejections
+                    (unit_id, job_number, reason, notice_type, publish_date, rejected_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [row + (now,) for row in rejections])
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"記錄淘汰候選失敗: {e}")
+
+
+def prune_tender_detail_cache(keep_days=DETAIL_CACHE_KEEP_DAYS):
+    """清理超過保留天數的標案詳細資料快取（活躍標案的快取保留，評分版本變更時重新評分用）"""
+    try:
+        with get_db() as conn:
+            cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+            cursor = conn.execute("""
+                DELETE FROM tender_detail_cache
+                WHERE fetched_at < ?
+                  AND (unit_id, job_number) NOT IN (SELECT unit_id, job_number FROM tenders)
+            """, (cutoff,))
+            deleted_count = cursor.rowcount
+            conn.commit()
+
+            if deleted_count > 0:
+                logger.info(f"清理了 {deleted_count} 筆過期的詳細資料快取")
+
+            return deleted_count
+    except sqlite3.Error as e:
+        logger.error(f"清理詳細資料快取失敗: {e}")
+        return 0
+
+
 # ===== LINE Messaging API 通知 =====
 
 def format_line_notification(mode, new_tenders, status_changes=None, report_url=None):
@@ -476,7 +1054,7 @@ def send_line_message(message):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = http_client.post(url, headers=headers, json=payload, timeout=10)
         if response.status_code == 200:
             logger.info("LINE 通知發送成功")
             return True
@@ -585,69 +1163,196 @@ def parse_roc_date(roc_date_str):
         return None
 
 
-def get_tender_detail(unit_id, job_number):
-    """查詢單一標案的詳細資料，回傳 (budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name)"""
+# 共用自適應限速器（跨執行緒）
+api_limiter = http_client.AdaptiveRateLimiter(
+    rate=1 / API_DELAY,
+    min_rate=API_RATE_MIN,
+    max_rate=API_RATE_MAX,
+    increase=API_RATE_INCREASE,
+    decrease=API_RATE_DECREASE
+)
+
+
+def api_get(path, params, headers=None):
+    """
+    發送 PCC API GET 請求（經過自適應限速）
+
+    - 成功回應逐步提高速率
+    - 429 或逾時時降速、依 Retry-After 暫停後重試，最多 API_MAX_RETRIES 次
+    - 5xx 降速後直接回傳；其餘 HTTP 狀態碼（如 404）不影響速率
+    - 非 429 的錯誤狀態碼直接回傳，由呼叫端處理
+
+    Returns:
+        requests.Response
+    """
+    url = f"{API_BASE_URL}{path}"
+
+    for attempt in range(API_MAX_RETRIES + 1):
+        api_limiter.acquire()
+
+        try:
+            response = http_client.get(url, params=params, headers=headers or HEADERS, timeout=API_TIMEOUT)
+        except requests.exceptions.Timeout:
+            rate = api_limiter.on_throttle()
+            logger.warning(f"API 請求逾時 ({path} {params})，降速至 {rate:.2f} 次/秒")
+            if attempt == API_MAX_RETRIES:
+                raise
+            continue
+
+        if response.status_code == 429:
+            retry_after = http_client.parse_retry_after(response.headers.get('Retry-After'))
+            rate = api_limiter.on_throttle(retry_after)
+            wait_note = f"，暫停 {retry_after:.0f} 秒" if retry_after else ""
+            logger.warning(f"API 請求過於頻繁 ({path})，降速至 {rate:.2f} 次/秒{wait_note}")
+            if attempt == API_MAX_RETRIES:
+                response.raise_for_status()
+            continue
+
+        if response.ok:
+            rate = api_limiter.on_success()
+            logger.debug(f"API 速率: {rate:.2f} 次/秒")
+        elif response.status_code >= 500:
+            # 伺服器錯誤視為過載訊號：降速但不重試，由呼叫端處理
+            rate = api_limiter.on_throttle()
+            logger.warning(f"API 伺服器錯誤 HTTP {response.status_code} ({path})，降速至 {rate:.2f} 次/秒")
+        return response
+
+
+def get_cached_tender_payload(unit_id, job_number, max_age_hours=DETAIL_CACHE_TTL_HOURS):
+    """
+    從 tender_detail_cache 讀取標案原始 /tender 回應
+
+    Args:
+        max_age_hours: 快取有效時數，None 表示不論新舊都使用
+
+    Returns:
+        dict: 原始 JSON 回應，無快取或已過期時回傳 None
+    """
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            sql = "SELECT payload FROM tender_detail_cache WHERE unit_id = ? AND job_number = ?"
+            params = [unit_id, job_number]
+            if max_age_hours is not None:
+                cutoff = (datetime.now() - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d %H:%M:%S")
+                sql += " AND fetched_at >= ?"
+                params.append(cutoff)
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"讀取詳細資料快取失敗 ({unit_id}/{job_number}): {e}")
+        return None
+
+    if row is None:
+        return None
+
+    try:
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+    except (zlib.error, ValueError) as e:
+        logger.warning(f"詳細資料快取損毀 ({unit_id}/{job_number}): {e}")
+        return None
+
+
+def save_tender_payload(unit_id, job_number, payload):
+    """將標案原始 /tender 回應壓縮後寫入 tender_detail_cache"""
+    blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     try:
-        # 加入延遲避免 rate limiting
-        time.sleep(API_DELAY)
+        with get_db() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO tender_detail_cache (unit_id, job_number, payload, fetched_at)
+                VALUES (?, ?, ?, ?)
+            """, (unit_id, job_number, blob, now))
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"寫入詳細資料快取失敗 ({unit_id}/{job_number}): {e}")
+
+
+def fetch_tender_records(unit_id, job_number, max_age_hours=DETAIL_CACHE_TTL_HOURS):
+    """
+    取得標案 /tender 回應的 records（經過 tender_detail_cache 快取）
+
+    快取在有效期內直接回傳，不發送請求；否則查詢 API 並更新快取。
+    網路錯誤直接拋出，由呼叫端處理。
 
-        url = f"{API_BASE_URL}/tender"
+    Returns:
+        list: records 列表（可能為空）
+    """
+    payload = get_cached_tender_payload(unit_id, job_number, max_age_hours)
+
+    if payload is None:
         params = {'unit_id': unit_id, 'job_number': job_number}
 
-        response = requests.get(url, params=params, headers=HEADERS, timeout=API_TIMEOUT)
+        response = api_get("/tender", params)
         response.raise_for_status()
 
-        data = response.json()
-        if 'records' in data and len(data['records']) > 0:
-            records = data['records']
+        payload = response.json()
+        save_tender_payload(unit_id, job_number, payload)
 
-            # 優先選擇「公開招標公告」類型（包含 pkPmsMain），如果有多筆取日期最新的
-            tender_records = [r for r in records if r.get('detail', {}).get('type') == '公開招標公告']
+    return payload.get('records') or []
 
-            if tender_records:
-                # 如果有多筆招標公告，取日期最新的
-                selected_record = max(tender_records, key=lambda r: r.get('date', 0))
-            else:
-                # 如果沒有「公開招標公告」，取所有 records 中日期最新的
-                selected_record = max(records, key=lambda r: r.get('date', 0))
 
-            detail = selected_record.get('detail', {})
+def select_tender_detail(records):
+    """從 /tender records 中選出代表性的公告，回傳其 detail"""
+    if not records:
+        return None
 
-            # 基本資訊
-            budget_str = detail.get('採購資料:預算金額', '')
-            pk_pms_main = detail.get('pkPmsMain', '')
-            deadline_str = detail.get('領投開標:截止投標', '')
-            tender_url = detail.get('url', '')
+    # 優先選擇「公開招標公告」類型（包含 pkPmsMain），如果有多筆取日期最新的
+    tender_records = [r for r in records if r.get('detail', {}).get('type') == '公開招標公告']
 
-            # 新增：決策關鍵資訊
-            award_type = detail.get('領投開標:決標方式', '')
-            is_electronic_str = detail.get('領投開標:是否', '')  # 電子投標
-            is_electronic = 1 if '是' in is_electronic_str else 0
+    if tender_records:
+        # 如果有多筆招標公告，取日期最新的
+        selected_record = max(tender_records, key=lambda r: r.get('date', 0))
+    else:
+        # 如果沒有「公開招標公告」，取所有 records 中日期最新的
+        selected_record = max(records, key=lambda r: r.get('date', 0))
 
-            deposit_str = detail.get('領投開標:押標金', '')
-            requires_deposit = 0 if '免' in deposit_str or '否' in deposit_str or not deposit_str else 1
+    return selected_record.get('detail', {})
 
-            contract_duration = detail.get('履約資訊:履約期限', '')
-            qualification = detail.get('投標廠商資格', '')
-            # 截取資格限制前150字作為摘要
-            qualification_summary = qualification[:150] if qualification else ''
 
-            # 機關名稱
-            unit_name = detail.get('機關資料:機關名稱', '')
+def parse_tender_detail(detail):
+    """解析標案 detail，回傳 (budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name)，缺少預算或截止日期時回傳 None"""
+    if not detail:
+        return None
 
-            budget = parse_budget(budget_str)
-            deadline = parse_roc_date(deadline_str)
+    # 基本資訊
+    budget_str = detail.get('採購資料:預算金額', '')
+    pk_pms_main = detail.get('pkPmsMain', '')
+    deadline_str = detail.get('領投開標:截止投標', '')
+    tender_url = detail.get('url', '')
 
-            if budget and deadline:
-                return (budget, pk_pms_main, deadline, tender_url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name)
+    # 新增：決策關鍵資訊
+    award_type = detail.get('領投開標:決標方式', '')
+    is_electronic_str = detail.get('領投開標:是否', '')  # 電子投標
+    is_electronic = 1 if '是' in is_electronic_str else 0
 
-        return None
+    deposit_str = detail.get('領投開標:押標金', '')
+    requires_deposit = 0 if '免' in deposit_str or '否' in deposit_str or not deposit_str else 1
+
+    contract_duration = detail.get('履約資訊:履約期限', '')
+    qualification = detail.get('投標廠商資格', '')
+    # 截取資格限制前150字作為摘要
+    qualification_summary = qualification[:150] if qualification else ''
+
+    # 機關名稱
+    unit_name = detail.get('機關資料:機關名稱', '')
+
+    budget = parse_budget(budget_str)
+    deadline = parse_roc_date(deadline_str)
+
+    if budget and deadline:
+        return (budget, pk_pms_main, deadline, tender_url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name)
+
+    return None
+
+
+def get_tender_detail(unit_id, job_number, max_age_hours=DETAIL_CACHE_TTL_HOURS):
+    """查詢單一標案的詳細資料（經過快取，max_age_hours=0 時重新查詢），回傳 (budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name)"""
+    try:
+        records = fetch_tender_records(unit_id, job_number, max_age_hours)
+        return parse_tender_detail(select_tender_detail(records))
 
     except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429:
-            logger.warning(f"API 請求過於頻繁，等待後重試...")
-            time.sleep(3)  # 等待 3 秒後重試
-            return get_tender_detail(unit_id, job_number)  # 遞迴重試一次
         logger.error(f"查詢標案詳細資料失敗 ({unit_id}/{job_number}): HTTP {e.response.status_code}")
         return None
     except requests.exceptions.Timeout:
@@ -658,95 +1363,278 @@ def get_tender_detail(unit_id, job_number):
         return None
 
 
-
-def fetch_tenders_by_date_range(days_to_search):
+def fetch_tender_details(keys, max_workers=DETAIL_CONCURRENCY):
     """
-    查詢指定日期範圍的標案並過濾
+    並行查詢多筆標案詳細資料
 
     Args:
-        days_to_search: 從今天往前推幾天
+        keys: (unit_id, job_number) 列表，重複的 key 只查詢一次
+        max_workers: 同時進行中的請求上限
 
     Returns:
-        list: 符合條件的候選標案
+        dict: {(unit_id, job_number): get_tender_detail 回傳值（tuple 或 None）}
     """
-    today = datetime.now()
-    all_candidates = []
+    unique_keys = list(dict.fromkeys(keys))
+    if not unique_keys:
+        return {}
+
+    logger.info(f"並行查詢 {len(unique_keys)} 筆詳細資料（並行數: {max_workers}）")
+    started = time.monotonic()
+
+    with db_thread_pool(max_workers) as executor:
+        results = executor.map(lambda key: get_tender_detail(*key), unique_keys)
+        details = dict(zip(unique_keys, results))
+
+    elapsed = time.monotonic() - started
+    found = sum(1 for result in details.values() if result is not None)
+    logger.info(
+        f"詳細資料查詢完成：{found}/{len(unique_keys)} 筆，耗時 {elapsed:.1f} 秒，"
+        f"目前 API 速率 {api_limiter.rate:.2f} 次/秒"
+    )
+    return details
 
-    logger.info(f"查詢最近 {days_to_search} 天的標案")
 
-    for days_ago in range(days_to_search):
-        target_date = today - timedelta(days=days_ago)
-        date_str = target_date.strftime("%Y%m%d")
+def log_connection_stats():
+    """輸出共用 HTTP 連線池的重用統計"""
+    stats = http_client.connection_stats()
+    if stats['requests'] == 0:
+        return
+    reuse_rate = stats['reused'] / stats['requests'] * 100
+    logger.info(
+        f"HTTP 連線統計：{stats['requests']} 次請求，新建連線 {stats['new_connections']} 條，"
+        f"重用 {stats['reused']} 次（重用率 {reuse_rate:.0f}%）"
+    )
 
-        logger.info(f"\n查詢日期: {target_date.strftime('%Y-%m-%d')}")
 
-        url = f"{API_BASE_URL}/listbydate"
-        params = {'date': date_str}
+# ===== /listbydate 本地快取 =====
 
-        try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=API_TIMEOUT)
-            response.raise_for_status()
-
-            data = response.json()
-            records = data.get('records', [])
-
-            logger.info(f"  取得 {len(records):,} 筆")
-
-            # 本地關鍵字過濾
-            matched = 0
-            for record in records:
-                brief_data = record.get('brief', {})
-                title = brief_data.get('title', '')
-                tender_type = brief_data.get('type', '')
-
-                # 兩階段過濾邏輯
-                # 階段 1: 優先檢查硬體排除（最高優先級）
-                if any(hard_ex in title for hard_ex in HARD_EXCLUDE):
-                    continue  # 直接跳過硬體/設備採購
-
-                # 階段 2: 檢查是否包含必要關鍵字
-                has_must_include = any(kw in title for kw in MUST_INCLUDE_KEYWORDS)
-                has_system_keyword = any(kw in title for kw in SYSTEM_KEYWORDS)
-
-                if has_must_include:
-                    # 優先關鍵字：直接通過（已過硬體排除）
-                    record['brief'] = title
-                    record['publish_date'] = target_date.strftime('%Y-%m-%d')
-                    record['status'] = tender_type
-                    all_candidates.append(record)
-                    matched += 1
-                elif has_system_keyword:
-                    # 次級關鍵字：需要額外檢查排除列表
-                    if not any(ex_kw in title for ex_kw in KEYWORDS_EXCLUDE):
-                        record['brief'] = title
-                        record['publish_date'] = target_date.strftime('%Y-%m-%d')
-                        record['status'] = tender_type
-                        all_candidates.append(record)
-                        matched += 1
-
-            if matched > 0:
-                logger.info(f"  符合關鍵字: {matched} 筆")
-
-            time.sleep(API_DELAY)
-
-        except Exception as e:
-            logger.error(f"  查詢失敗: {e}")
-            continue
+def _read_listbydate_cache(cache_file):
+    """讀取單日快取，檔案不存在或損毀時回傳 None"""
+    try:
+        with gzip.open(cache_file, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"快取檔案損毀，重新抓取: {cache_file} - {e}")
+        return None
 
-    logger.info(f"\n總計候選標案: {len(all_candidates)} 筆")
-    return all_candidates
 
+def _write_listbydate_cache(cache_file, entry):
+    """寫入單日快取（先寫暫存檔再替換，避免中斷時留下半個檔案）"""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+        with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"寫入快取失敗: {cache_file} - {e}")
 
-def fetch_tenders(mode='quick'):
+
+def fetch_listbydate_records(target_date):
+    """
+    取得單日 /listbydate 記錄（經過本地快取）
+
+    新鮮度策略：
+    - 今天：一律重新抓取
+    - 快取最後驗證時間距該日期未滿 LISTBYDATE_REVALIDATE_DAYS 天：
+      帶 If-None-Match / If-Modified-Since 重新驗證，304 時沿用快取
+    - 其餘：直接使用快取，不發送請求
+
+    Args:
+        target_date: 查詢日期 (datetime)
+
+    Returns:
+        tuple: (records, 快取狀態 'hit' | 'revalidated' | 'miss')
+    """
+    date_str = target_date.strftime("%Y%m%d")
+    cache_file = LISTBYDATE_CACHE_DIR / f"{date_str}.json.gz"
+    age_days = (datetime.now().date() - target_date.date()).days
+
+    cached = _read_listbydate_cache(cache_file) if age_days > 0 else None
+
+    if cached:
+        validated_on = datetime.strptime(cached['validated_at'][:10], '%Y-%m-%d').date()
+        if (validated_on - target_date.date()).days >= LISTBYDATE_REVALIDATE_DAYS:
+            return cached['records'], 'hit'
+
+    params = {'date': date_str}
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = api_get("/listbydate", params, headers=headers)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if response.status_code == 304 and cached:
+        cached['validated_at'] = now
+        _write_listbydate_cache(cache_file, cached)
+        return cached['records'], 'revalidated'
+
+    response.raise_for_status()
+
+    data = response.json()
+    records = data.get('records', [])
+
+    _write_listbydate_cache(cache_file, {
+        'date': date_str,
+        'fetched_at': now,
+        'validated_at': now,
+        'etag': response.headers.get('ETag', ''),
+        'last_modified': response.headers.get('Last-Modified', ''),
+        'records': records
+    })
+    return records, 'miss'
+
+
+def prune_listbydate_cache(keep_days=LISTBYDATE_CACHE_KEEP_DAYS):
+    """刪除超過保留天數的 /listbydate 快取檔案"""
+    if not LISTBYDATE_CACHE_DIR.exists():
+        return 0
+
+    cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y%m%d")
+    removed = 0
+    for cache_file in LISTBYDATE_CACHE_DIR.glob("*.json.gz"):
+        if cache_file.name[:8] < cutoff:
+            try:
+                cache_file.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"刪除快取失敗: {cache_file} - {e}")
+
+    if removed > 0:
+        logger.info(f"清理了 {removed} 個過期的列表快取")
+    return removed
+
+
+def is_candidate_title(title):
+    """
+    兩階段標題過濾：判斷標題是否為軟體類候選標案
+
+    - 階段 1：含硬體排除關鍵字 → 淘汰（最高優先級）
+    - 階段 2：含優先關鍵字 → 通過；含次級關鍵字且不含排除關鍵字 → 通過
+    """
+    hits = TITLE_MATCHER.groups_in(title)
+
+    if 'hard_exclude' in hits:
+        return False  # 直接跳過硬體/設備採購
+    if 'must_include' in hits:
+        return True  # 優先關鍵字：直接通過（已過硬體排除）
+    # 次級關鍵字：需要額外檢查排除列表
+    return 'system' in hits and 'exclude' not in hits
+
+
+def fetch_candidates_for_date(target_date):
+    """
+    查詢單日標案列表並以關鍵字過濾
+
+    Args:
+        target_date: 查詢日期 (datetime)
+
+    Returns:
+        tuple: (取得筆數, 符合條件的候選標案列表, 快取狀態)
+    """
+    records, cache_status = fetch_listbydate_records(target_date)
+    return len(records), filter_candidate_records(records, target_date), cache_status
+
+
+def filter_candidate_records(records, target_date):
+    """以標題關鍵字過濾單日列表，回傳候選標案（補上 brief、publish_date、status 欄位）"""
+    candidates = []
+    for record in records:
+        brief_data = record.get('brief', {})
+        title = brief_data.get('title', '')
+        tender_type = brief_data.get('type', '')
+
+        if is_candidate_title(title):
+            record['brief'] = title
+            record['publish_date'] = target_date.strftime('%Y-%m-%d')
+            record['status'] = tender_type
+            candidates.append(record)
+
+    return candidates
+
+
+def dedupe_candidates(candidates, seen_keys):
+    """
+    依 (unit_id, job_number) 去除重複的候選標案，回傳 (保留的候選標案, 移除筆數)
+
+    同一標案會因原公告、更正公告、重新招標等出現在多日列表；呼叫端須依日期由近到遠送入，
+    第一次出現者即為最新一次公告（保留其公告類型與日期）。seen_keys 會加入所有看過的 key。
+    """
+    unique = []
+    for tender in candidates:
+        key = (tender['unit_id'], tender['job_number'])
+        if key not in seen_keys:
+            seen_keys.add(key)
+            unique.append(tender)
+    return unique, len(candidates) - len(unique)
+
+
+def fetch_tenders_by_date_range(days_to_search, max_workers=LISTBYDATE_CONCURRENCY):
+    """
+    查詢指定日期範圍的標案並過濾
+
+    各日期的查詢彼此獨立，以執行緒池並行查詢，結果依日期（由近到遠）合併，
+    同一標案只保留最新一次公告（見 dedupe_candidates）。
+
+    Args:
+        days_to_search: 從今天往前推幾天
+        max_workers: 同時進行中的 /listbydate 請求上限
+
+    Returns:
+        list: 符合條件的候選標案（每個標案一筆）
+    """
+    today = datetime.now()
+    target_dates = [today - timedelta(days=days_ago) for days_ago in range(days_to_search)]
+    all_candidates = []
+    seen_keys = set()
+    duplicates = 0
+    cache_stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+    cache_labels = {'hit': '快取', 'revalidated': '已驗證', 'miss': '下載'}
+
+    logger.info(f"查詢最近 {days_to_search} 天的標案（並行數: {max_workers}）")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(fetch_candidates_for_date, d) for d in target_dates]
+
+        # 依日期順序合併結果
+        for target_date, future in zip(target_dates, futures):
+            date_label = target_date.strftime('%Y-%m-%d')
+            try:
+                total, candidates, cache_status = future.result()
+            except Exception as e:
+                logger.error(f"  {date_label} 查詢失敗: {e}")
+                continue
+
+            cache_stats[cache_status] += 1
+            unique, removed = dedupe_candidates(candidates, seen_keys)
+            duplicates += removed
+            logger.info(
+                f"  {date_label} 取得 {total:,} 筆（{cache_labels[cache_status]}），"
+                f"符合關鍵字: {len(candidates)} 筆（重複公告 {removed} 筆）"
+            )
+            all_candidates.extend(unique)
+
+    logger.info(f"\n總計候選標案: {len(all_candidates)} 筆（移除跨日重複公告 {duplicates} 筆）")
+    logger.info(
+        f"列表快取：命中 {cache_stats['hit']} 天，重新驗證未變更 {cache_stats['revalidated']} 天，"
+        f"下載 {cache_stats['miss']} 天，目前 API 速率 {api_limiter.rate:.2f} 次/秒"
+    )
+    return all_candidates
+
+
+def fetch_tenders(mode='quick'):
     """抓取並過濾政府採購標案"""
     logger.info("="*60)
     logger.info(f"開始抓取資料... (模式: {mode})")
     logger.info("="*60)
 
     try:
-        # 初始化資料庫
-        init_db()
-
         # 清理 3 個月前的舊資料
         cleanup_old_tenders()
 
@@ -764,22 +1652,36 @@ def fetch_tenders(mode='quick'):
         logger.info("\n開始查詢詳細資料...")
         new_cases = []
 
+        # 篩選新案（批次檢查）
+        new_keys = find_new_tender_keys(
+            (r.get('unit_id', ''), r.get('job_number', '')) for r in candidates
+        )
+        new_records = []
         for record in candidates:
             brief_data = record.get('brief', {})
             title = brief_data.get('title', '')
-            unit_id = record.get('unit_id', '')
-            job_number = record.get('job_number', '')
-            unit_name = record.get('unit_name', 'N/A')
 
             # 檢查是否為新案
-            if not is_new_tender(unit_id, job_number):
+            if (record.get('unit_id', ''), record.get('job_number', '')) not in new_keys:
                 logger.debug(f"  跳過已存在標案: {title[:40]}...")
                 continue
 
             logger.info(f"  ✓ 發現候選標案: {title[:60]}...")
+            new_records.append(record)
+
+        # 並行查詢詳細資料取得預算和截止日期
+        details = fetch_tender_details(
+            [(r.get('unit_id', ''), r.get('job_number', '')) for r in new_records]
+        )
+
+        for record in new_records:
+            brief_data = record.get('brief', {})
+            title = brief_data.get('title', '')
+            unit_id = record.get('unit_id', '')
+            job_number = record.get('job_number', '')
+            unit_name = record.get('unit_name', 'N/A')
 
-            # 查詢詳細資料取得預算和截止日期
-            result = get_tender_detail(unit_id, job_number)
+            result = details.get((unit_id, job_number))
 
             if result is None:
                 logger.warning(f"    無法取得完整資訊,跳過")
@@ -902,6 +1804,8 @@ def fetch_tenders(mode='quick'):
         else:
             logger.info("目前沒有符合條件的新標案")
 
+        log_connection_stats()
+
         logger.info("="*60)
         logger.info("執行完成")
         logger.info("="*60)
@@ -923,7 +1827,7 @@ def fetch_tenders(mode='quick'):
 def count_active_tenders():
     """統計資料庫中活躍標案數量"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM tenders")
             result = cursor.fetchone()
@@ -933,37 +1837,558 @@ def count_active_tenders():
         return 0
 
 
-# ============================================================
-# 執行模式
-# ============================================================
+def archive_missing_tenders(current_tender_keys, archive_reason="not_in_current_scan"):
+    """
+    將不在本次掃描結果中的標案移至歸檔表
+
+    掃描結果的 key 先寫入暫存表，歸檔與刪除各以一條集合式 SQL 完成，並在同一個交易內提交；
+    淘汰紀錄也一併只保留仍在掃描範圍內的標案。
+
+    Args:
+        current_tender_keys: 本次掃描到的 (unit_id, job_number) 集合
+
+    Returns:
+        int: 歸檔（刪除）的標案數
+    """
+    stale_condition = """
+        (unit_id, job_number) NOT IN (SELECT unit_id, job_number FROM current_scan_keys)
+    """
+    archived_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS current_scan_keys (
+                    unit_id TEXT,
+                    job_number TEXT,
+                    PRIMARY KEY (unit_id, job_number)
+                )
+            """)
+            cursor.execute("DELETE FROM current_scan_keys")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO current_scan_keys (unit_id, job_number) VALUES (?, ?)",
+                current_tender_keys
+            )
+
+            cursor.execute(f"SELECT brief FROM tenders WHERE {stale_condition}")
+            for (brief,) in cursor.fetchall():
+                logger.info(f"  刪除: {brief[:40]}...")
+
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO tenders_archive (
+                    unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
+                    date_added, notified, status, publish_date, last_checked, last_status_change,
+                    qualification_summary, url, award_type, is_electronic, requires_deposit, contract_duration,
+                    score, difficulty, competition, scoring_version,
+                    archived_at, archive_reason
+                )
+                SELECT unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
+                       date_added, notified, status, publish_date, last_checked, last_status_change,
+                       qualification_summary, url, award_type, is_electronic, requires_deposit, contract_duration,
+                       score, difficulty, competition, scoring_version,
+                       ?, ?
+                FROM tenders
+                WHERE {stale_condition}
+            """, (archived_at, archive_reason))
+
+            cursor.execute(f"DELETE FROM tenders WHERE {stale_condition}")
+            deleted_count = cursor.rowcount
+
+            # 淘汰紀錄只需保留仍在掃描範圍內的標案
+            cursor.execute(f"DELETE FROM tender_rejections WHERE {stale_condition}")
+
+            conn.commit()
+            return deleted_count
+    except sqlite3.Error as e:
+        logger.error(f"清理標案失敗: {e}")
+        return 0
+
+
+# ===== 同步檢查點 =====
 
-def sync_mode():
+# 檢查點保存的候選標案欄位（續跑時直接還原為管線中的候選標案）
+CHECKPOINT_CANDIDATE_FIELDS = ('unit_id', 'job_number', 'brief', 'unit_name', 'status', 'publish_date')
+
+
+def start_sync_run(run_date, days_to_search):
+    """建立新的同步執行紀錄並回傳 run_id；相同掃描天數但未完成的執行標記為放棄並清除其檢查點"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for (run_id,) in cursor.execute(
+            "SELECT run_id FROM sync_runs WHERE status = 'running' AND days_to_search = ?", (days_to_search,)
+        ).fetchall():
+            logger.info(f"上次同步未完成（run #{run_id}），本次重新開始（可用 --resume 續跑）")
+            cursor.execute("UPDATE sync_runs SET status = 'abandoned', updated_at = ? WHERE run_id = ?", (now, run_id))
+            _clear_sync_checkpoint(cursor, run_id)
+        cursor.execute("""
+            INSERT INTO sync_runs (run_date, days_to_search, status, started_at, updated_at)
+            VALUES (?, ?, 'running', ?, ?)
+        """, (run_date, days_to_search, now, now))
+        return cursor.lastrowid
+
+
+def find_resumable_sync_run(days_to_search, max_age_hours=SYNC_RESUME_MAX_AGE_HOURS):
+    """找出 max_age_hours 內開始、相同掃描天數且尚未完成的最近一次同步，回傳 (run_id, run_date)，沒有時回傳 None"""
+    cutoff = (datetime.now() - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d %H:%M:%S")
+    with get_db() as conn:
+        return conn.execute("""
+            SELECT run_id, run_date FROM sync_runs
+            WHERE status = 'running' AND days_to_search = ? AND started_at >= ?
+            ORDER BY run_id DESC LIMIT 1
+        """, (days_to_search, cutoff)).fetchone()
+
+
+def rebase_sync_run(run_id, previous_run_date, run_date):
     """
-    同步模式：每天完整同步 14 天資料
+    將前幾天開始的未完成同步改為今天續跑
 
-    - 重新抓取 14 天資料
-    - 與資料庫對比同步
-    - 刪除已結束/過期的標案
-    - 發送新案通知
+    previous_run_date 當天（含）以後的列表在當時尚未公告完整，自檢查點移除後重新掃描；
+    更早的日期沿用檢查點。超出今天掃描範圍的日期由呼叫端忽略。
     """
-    logger.info("="*60)
-    logger.info("執行模式：資料同步")
-    logger.info("="*60)
+    with get_db() as conn:
+        for table in ("sync_run_days", "sync_run_candidates"):
+            conn.execute(f"DELETE FROM {table} WHERE run_id = ? AND list_date >= ?", (run_id, previous_run_date))
+        conn.execute(
+            "UPDATE sync_runs SET run_date = ?, updated_at = ? WHERE run_id = ?",
+            (run_date, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), run_id)
+        )
 
-    # 1. 重新抓取 14 天資料
-    logger.info("\n開始掃描最近 14 天標案...")
-    all_candidates = fetch_tenders_by_date_range(days_to_search=14)
 
-    if not all_candidates:
-        logger.info("未找到符合條件的標案")
-        return
+def load_sync_checkpoint(run_id):
+    """讀取已完成掃描的日期與其候選標案，回傳 {list_date: [候選標案 dict]}"""
+    with get_db() as conn:
+        checkpoint = {
+            list_date: [] for (list_date,) in conn.execute(
+                "SELECT list_date FROM sync_run_days WHERE run_id = ?", (run_id,)
+            )
+        }
+        rows = conn.execute(f"""
+            SELECT list_date, {', '.join(CHECKPOINT_CANDIDATE_FIELDS)}
+            FROM sync_run_candidates
+            WHERE run_id = ?
+            ORDER BY rowid
+        """, (run_id,))
+        for list_date, *values in rows:
+            if list_date in checkpoint:
+                checkpoint[list_date].append(dict(zip(CHECKPOINT_CANDIDATE_FIELDS, values)))
+    return checkpoint
+
+
+def save_day_checkpoint(run_id, list_date, candidates):
+    """記錄單日列表已掃描完成與其候選標案（同一交易）"""
+    with get_db() as conn:
+        conn.executemany(f"""
+            INSERT INTO sync_run_candidates (run_id, list_date, {', '.join(CHECKPOINT_CANDIDATE_FIELDS)})
+            VALUES (?, ?, {', '.join('?' * len(CHECKPOINT_CANDIDATE_FIELDS))})
+        """, [
+            (run_id, list_date) + tuple(tender.get(field, '') for field in CHECKPOINT_CANDIDATE_FIELDS)
+            for tender in candidates
+        ])
+        conn.execute("INSERT OR IGNORE INTO sync_run_days (run_id, list_date) VALUES (?, ?)", (run_id, list_date))
+        conn.execute(
+            "UPDATE sync_runs SET updated_at = ? WHERE run_id = ?",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), run_id)
+        )
 
-    logger.info(f"掃描完成，找到 {len(all_candidates)} 筆符合條件的標案")
 
-    # 2. 回填缺少 URL 或 unit_name 的標案
-    logger.info("\n檢查並回填缺少 URL 或機關名稱的標案...")
+def count_scanned_days(run_id, list_dates):
+    """回傳 list_dates（'YYYY-MM-DD'）中已完成列表掃描的日數"""
+    with get_db() as conn:
+        scanned = {row[0] for row in conn.execute("SELECT list_date FROM sync_run_days WHERE run_id = ?", (run_id,))}
+    return len(scanned.intersection(list_dates))
+
+
+def load_unnotified_tenders():
+    """讀取尚未通知的新案（含中斷或未完成的同步所儲存者），格式同 LINE 通知所需的 dict"""
+    with get_db() as conn:
+        cursor = conn.execute("""
+            SELECT unit_id, job_number, brief, unit_name AS unit, budget, deadline, pk_pms_main, url,
+                   award_type, is_electronic, requires_deposit, contract_duration, qualification_summary
+            FROM tenders
+            WHERE notified = 0
+            ORDER BY date_added, rowid
+        """)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def mark_tenders_notified(tenders):
+    """將已通知的新案標記為 notified，下次同步不再推播"""
+    with get_db() as conn:
+        conn.executemany(
+            "UPDATE tenders SET notified = 1 WHERE unit_id = ? AND job_number = ?",
+            [(t['unit_id'], t['job_number']) for t in tenders]
+        )
+
+
+def _clear_sync_checkpoint(cursor, run_id):
+    for table in ("sync_run_days", "sync_run_candidates"):
+        cursor.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+
+def load_deferred_keys():
+    """讀取上次因時間預算用盡而延後的新案 key"""
+    with get_db() as conn:
+        return set(conn.execute("SELECT unit_id, job_number FROM deferred_details").fetchall())
+
+
+def update_deferred_details(seen_keys, tenders, keep_days=DEEP_MODE_DAYS):
+    """
+    更新延後查詢的新案：本次掃描到的 key 先移除，再寫入本次延後者
+
+    沒有再出現在列表中的延後紀錄保留 keep_days 天（列表掃描中斷時不會遺失）。
+    """
+    now = datetime.now()
+    cutoff = (now - timedelta(days=keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+    with get_db() as conn:
+        conn.executemany("DELETE FROM deferred_details WHERE unit_id = ? AND job_number = ?", seen_keys)
+        conn.execute("DELETE FROM deferred_details WHERE deferred_at < ?", (cutoff,))
+        now = now.strftime("%Y-%m-%d %H:%M:%S")
+        conn.executemany("""
+            INSERT OR REPLACE INTO deferred_details (unit_id, job_number, brief, publish_date, deferred_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (t['unit_id'], t['job_number'], t['brief'], t.get('publish_date', ''), now)
+            for t in tenders
+        ])
+
+
+def finish_sync_run(run_id):
+    """標記同步完成並清除檢查點（sync_runs 保留為執行紀錄）"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE sync_runs SET status = 'completed', updated_at = ?, finished_at = ? WHERE run_id = ?",
+            (now, now, run_id)
+        )
+        _clear_sync_checkpoint(cursor, run_id)
+
+
+# ===== 同步管線 =====
+
+# 管線結束標記（上游階段結束時放入佇列）
+_PIPELINE_DONE = object()
+
+
+def _get_from_queue(inbox, cancel):
+    """逐一取出佇列內容直到結束標記；管線被取消時提前結束"""
+    while not cancel.is_set():
+        try:
+            item = inbox.get(timeout=PIPELINE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if item is _PIPELINE_DONE:
+            return
+        yield item
+
+
+def _put_to_queue(outbox, item, cancel):
+    """放入有界佇列（下游較慢時在此等待），管線被取消時回傳 False"""
+    while not cancel.is_set():
+        try:
+            outbox.put(item, timeout=PIPELINE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _run_pipeline_stage(stage, inbox, outbox, cancel, errors):
+    """在獨立執行緒執行單一階段：inbox 的內容交給 stage 生成器，產出放入 outbox"""
+    try:
+        outputs = stage(_get_from_queue(inbox, cancel)) if inbox is not None else stage()
+        for item in outputs:
+            if not _put_to_queue(outbox, item, cancel):
+                break
+        _put_to_queue(outbox, _PIPELINE_DONE, cancel)
+    except Exception as e:
+        logger.error(f"同步管線階段 {threading.current_thread().name} 失敗: {e}")
+        errors.append(e)
+        cancel.set()
+    finally:
+        # 階段執行緒結束即關閉其連線；不做 WAL 檢查點，避免等待其他階段的讀取
+        close_db(checkpoint=False)
+
+
+def run_pipeline(source, *stages, maxsize=PIPELINE_QUEUE_SIZE):
+    """
+    以執行緒串接生成器階段：source() → stages[0] → ... → stages[-1]
+
+    每個階段一條執行緒，階段之間以有界佇列傳遞，下游較慢時上游會被擋住（記憶體有上限）。
+    回傳最後一個階段產出的產生器，由呼叫端執行緒消費；總耗時趨近最慢的階段而非各階段相加。
+    任一階段拋出例外時取消整條管線，並在消費端重新拋出。
+    """
+    cancel = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+    inboxes = [None] + queues[:-1]
+    workers = [
+        threading.Thread(
+            target=_run_pipeline_stage, args=(stage, inbox, outbox, cancel, errors),
+            name=getattr(getattr(stage, 'func', stage), '__name__', 'stage'), daemon=True
+        )
+        for stage, inbox, outbox in zip((source,) + stages, inboxes, queues)
+    ]
+
+    for worker in workers:
+        worker.start()
+    try:
+        yield from _get_from_queue(queues[-1], cancel)
+    finally:
+        cancel.set()
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        raise errors[0]
+
+
+def iter_listing_days(target_dates, cache_stats, checkpoint=None, max_workers=LISTBYDATE_CONCURRENCY):
+    """
+    管線來源：並行查詢各日 /listbydate，依日期（由近到遠）逐日產生 (target_date, records, cache_status)
+
+    checkpoint 內已掃描的日期不再查詢，直接產生其候選標案（cache_status 為 'checkpoint'）。
+    """
+    checkpoint = checkpoint or {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            d: executor.submit(fetch_listbydate_records, d)
+            for d in target_dates if d.strftime('%Y-%m-%d') not in checkpoint
+        }
+        for target_date in target_dates:
+            list_date = target_date.strftime('%Y-%m-%d')
+            if list_date in checkpoint:
+                cache_stats['checkpoint'] += 1
+                yield target_date, checkpoint[list_date], 'checkpoint'
+                continue
+            try:
+                records, cache_status = futures[target_date].result()
+            except Exception as e:
+                logger.error(f"  {target_date.strftime('%Y-%m-%d')} 查詢失敗: {e}")
+                continue
+            cache_stats[cache_status] += 1
+            yield target_date, records, cache_status
+
+
+def filter_listing_days(days, scan_stats, run_id=None):
+    """管線階段：關鍵字過濾，逐日產生候選標案列表；過濾完即寫入該日檢查點"""
+    cache_labels = {'hit': '快取', 'revalidated': '已驗證', 'miss': '下載', 'checkpoint': '檢查點'}
+    for target_date, records, cache_status in days:
+        if cache_status == 'checkpoint':
+            # 檢查點內已是過濾後的候選標案
+            candidates = records
+        else:
+            candidates = filter_candidate_records(records, target_date)
+            if run_id is not None:
+                save_day_checkpoint(run_id, target_date.strftime('%Y-%m-%d'), candidates)
+        scan_stats['candidates'] += len(candidates)
+        logger.info(
+            f"  {target_date.strftime('%Y-%m-%d')} 取得 {len(records):,} 筆（{cache_labels[cache_status]}），"
+            f"符合關鍵字: {len(candidates)} 筆"
+        )
+        yield candidates
+
+
+def dedupe_candidate_days(days, seen_keys, scan_stats):
+    """
+    管線階段：同一標案只保留第一次出現的公告，後續階段每個標案只處理一次
+
+    日期由近到遠送入，第一次出現即為最新一次公告（淘汰紀錄以此比對）；
+    所有 key 記入 seen_keys，同步結束後據以歸檔不在掃描結果中的標案。
+    """
+    for candidates in days:
+        unique, removed = dedupe_candidates(candidates, seen_keys)
+        scan_stats['duplicates'] += removed
+        yield unique
+
+
+def select_new_candidates(days, rejections, scan_stats):
+    """
+    管線階段：每日一次批次查詢資料庫，逐筆產生尚未儲存、且未因同一公告被淘汰過的新案
+
+    淘汰後列表公告有變更者（如更正公告延後截止）標記 refresh_detail，略過詳細資料快取重新查詢。
+    """
+    for candidates in days:
+        new_keys = find_new_tender_keys((t['unit_id'], t['job_number']) for t in candidates)
+        for tender in candidates:
+            key = (tender['unit_id'], tender['job_number'])
+            if key not in new_keys:
+                continue
+
+            # 先前已淘汰且列表公告未變更：不再查詢詳細資料
+            rejected_listing = rejections.get(key)
+            if rejected_listing == (tender.get('status', ''), tender.get('publish_date', '')):
+                scan_stats['skipped_rejected'] += 1
+                logger.debug(f"  已淘汰且公告未變更，跳過: {tender['brief'][:50]}...")
+                continue
+
+            if rejected_listing is not None:
+                tender['refresh_detail'] = True
+                logger.info(f"  淘汰後公告已變更，重新查詢: {tender['brief'][:50]}...")
+            else:
+                logger.info(f"  新案: {tender['brief'][:50]}...")
+            yield tender
+
+
+def detail_urgency(tender, deferred_keys):
+    """
+    詳細資料查詢的排序鍵（越小越優先）
+
+    截止日期要查過詳細資料才知道，先以列表資訊估計：上次延後的新案、公告日期較早者
+    （距截止較近）、等標期較短的公告類型、維護 / 開發類標題依序優先。
+    """
+    notice_type = tender.get('status', '')
+    notice_rank = next(
+        (rank for keyword, rank in NOTICE_TYPE_URGENCY if keyword in notice_type),
+        len(NOTICE_TYPE_URGENCY)
+    )
+    return (
+        (tender['unit_id'], tender['job_number']) not in deferred_keys,
+        tender.get('publish_date', ''),
+        notice_rank,
+        TENDER_TYPE_URGENCY.get(classify_tender_type(tender['brief']), len(TENDER_TYPE_URGENCY)),
+    )
+
+
+def prioritize_new_candidates(tenders, deferred_keys, window=PRIORITY_WINDOW):
+    """
+    管線階段（--time-budget）：以有界優先佇列依 detail_urgency 重新排序新案
+
+    累積超過 window 筆時即送出其中最急迫者，詳細資料查詢在列表掃描期間就開始；
+    列表掃描完畢後依序送出其餘。時間預算用盡時略過的是（視窗內）最不急的標案。
+    """
+    heap = []
+    order = itertools.count()  # 急迫程度相同時維持到達順序
+    carried = 0
+    for tender in tenders:
+        if (tender['unit_id'], tender['job_number']) in deferred_keys:
+            carried += 1
+        heapq.heappush(heap, (detail_urgency(tender, deferred_keys), next(order), tender))
+        if len(heap) > window:
+            yield heapq.heappop(heap)[2]
+
+    logger.info(f"列表掃描完畢，依急迫程度送出其餘 {len(heap)} 筆新案（上次延後 {carried} 筆優先）")
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def _budget_exhausted(stop_at):
+    return stop_at is not None and time.monotonic() >= stop_at
+
+
+# 時間預算用盡、未查詢詳細資料的工作回傳值
+_DETAIL_DEFERRED = object()
+
+
+def fetch_detail_within_budget(unit_id, job_number, max_age_hours, stop_at=None):
+    """
+    執行緒池工作：開始執行時才檢查時間預算（排隊中的工作可能在 stop_at 之後才輪到）
+
+    超過 stop_at 後只讀取詳細資料快取、不發送請求，沒有快取時回傳 _DETAIL_DEFERRED；
+    已開始的查詢照常完成（所需時間由 TIME_BUDGET_RESERVE 預留）。
+    """
+    if not _budget_exhausted(stop_at):
+        return get_tender_detail(unit_id, job_number, max_age_hours)
+    payload = get_cached_tender_payload(unit_id, job_number, max_age_hours)
+    if payload is None:
+        return _DETAIL_DEFERRED
+    return parse_tender_detail(select_tender_detail(payload.get('records') or []))
+
+
+def submit_detail_requests(tenders, stop_at=None, max_workers=DETAIL_CONCURRENCY):
+    """
+    管線階段：新案一到就送出詳細資料查詢，依送出順序產生 (tender, future)
+
+    進行中的請求數受下游佇列長度限制，不會一次堆積所有查詢。
+    時間預算由工作本身在開始時檢查（見 fetch_detail_within_budget）。
+    """
+    with db_thread_pool(max_workers) as executor:
+        for tender in tenders:
+            max_age_hours = 0 if tender.get('refresh_detail') else DETAIL_CACHE_TTL_HOURS
+            yield tender, executor.submit(
+                fetch_detail_within_budget, tender['unit_id'], tender['job_number'], max_age_hours, stop_at
+            )
+
+
+def filter_tender_details(items, new_rejections, scan_stats, deferred):
+    """
+    管線階段：等待詳細資料並做預算、截止日期過濾，淘汰者記入 new_rejections
+
+    時間預算用盡而未查詢的新案記入 deferred。
+    """
+    for tender, future in items:
+        key = (tender['unit_id'], tender['job_number'])
+        listing = (tender.get('status', ''), tender.get('publish_date', ''))
+        result = future.result()
+        if result is _DETAIL_DEFERRED:
+            deferred.append(tender)
+            continue
+        scan_stats['detail_requested'] += 1
+
+        if result is None:
+            logger.warning(f"  無法取得完整資訊，跳過: {tender['brief'][:50]}...")
+            continue
+        scan_stats['detail_found'] += 1
+
+        budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
+
+        # 預算過濾
+        if not (MIN_BUDGET <= budget <= MAX_BUDGET):
+            logger.debug(f"    預算不符 (${budget:,})")
+            new_rejections[key] = key + ('budget_out_of_range',) + listing
+            continue
+
+        # 截止日期檢查
+        try:
+            deadline_dt = datetime.strptime(deadline, "%Y-%m-%d %H:%M:%S")
+            if deadline_dt < datetime.now():
+                logger.debug(f"    已截止")
+                new_rejections[key] = key + ('deadline_passed',) + listing
+                continue
+        except:
+            logger.debug(f"    截止日期格式錯誤")
+            new_rejections[key] = key + ('deadline_invalid',) + listing
+            continue
+
+        logger.info(f"  ✓ 符合條件: {tender['brief'][:50]}... 預算: ${budget:,}, 截止: {deadline}")
+
+        yield {
+            'unit_id': tender['unit_id'],
+            'job_number': tender['job_number'],
+            'brief': tender['brief'],
+            'unit_name': unit_name or tender.get('unit_name', ''),  # 優先使用 API 取得的機關名稱
+            'budget': budget,
+            'pk_pms_main': pk_pms_main,
+            'deadline': deadline,
+            'url': url,
+            'award_type': award_type,
+            'is_electronic': is_electronic,
+            'requires_deposit': requires_deposit,
+            'contract_duration': contract_duration,
+            'qualification_summary': qualification_summary
+        }
+
+
+def save_tender_batch(tenders):
+    """
+    以單一交易儲存一批新案（notified = 0，發送通知後才標記），回傳成功儲存的筆數
+
+    整批在記憶體累積後才寫入，寫入鎖只在這段期間持有，不會擋住其他執行緒寫入詳細資料快取。
+    """
+    conn = get_db()
+    saved = sum(1 for tender in tenders if save_tender(**tender, commit=False))
+    conn.commit()
+    return saved
+
+
+def backfill_missing_details():
+    """回填缺少 URL 或 unit_name 的標案（經過詳細資料快取），回傳更新筆數"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT unit_id, job_number, brief
@@ -972,164 +2397,217 @@ def sync_mode():
             """)
             missing_data_tenders = cursor.fetchall()
 
-        if missing_data_tenders:
-            logger.info(f"發現 {len(missing_data_tenders)} 筆缺少資料的標案，開始回填...")
-            success_count = 0
-            for unit_id, job_number, brief in missing_data_tenders:
-                try:
-                    result = get_tender_detail(unit_id, job_number)
-                    if result:
-                        budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
-                        with sqlite3.connect(DB_PATH) as conn:
-                            cursor = conn.cursor()
-                            cursor.execute("""
-                                UPDATE tenders
-                                SET url = ?, unit_name = ?
-                                WHERE unit_id = ? AND job_number = ?
-                            """, (url, unit_name, unit_id, job_number))
-                            conn.commit()
-                        success_count += 1
-                        logger.debug(f"    回填成功: {brief[:30]}... (URL: {'有' if url else '無'}, 機關: {unit_name[:20] if unit_name else '無'}...)")
-                except Exception as e:
-                    logger.error(f"回填失敗 ({brief[:30]}...): {e}")
-                    continue
-            logger.info(f"資料回填完成：{success_count}/{len(missing_data_tenders)} 筆")
-        else:
+        if not missing_data_tenders:
             logger.info("所有標案的 URL 和機關名稱都完整")
+            return 0
+
+        logger.info(f"發現 {len(missing_data_tenders)} 筆缺少資料的標案，開始回填...")
+        backfill_details = fetch_tender_details(
+            [(unit_id, job_number) for unit_id, job_number, _ in missing_data_tenders]
+        )
+        updates = []
+        for unit_id, job_number, brief in missing_data_tenders:
+            result = backfill_details.get((unit_id, job_number))
+            if result:
+                budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
+                updates.append((url, unit_name, unit_id, job_number))
+                logger.debug(f"    回填成功: {brief[:30]}... (URL: {'有' if url else '無'}, 機關: {unit_name[:20] if unit_name else '無'}...)")
+
+        # 單一交易批次更新
+        with get_db() as conn:
+            conn.executemany("""
+                UPDATE tenders
+                SET url = ?, unit_name = ?
+                WHERE unit_id = ? AND job_number = ?
+            """, updates)
+        logger.info(f"資料回填完成：{len(updates)}/{len(missing_data_tenders)} 筆")
+        return len(updates)
     except Exception as e:
         logger.error(f"資料回填過程失敗: {e}")
+        return 0
+    finally:
+        close_db(checkpoint=False)
 
-    # 3. 建立「當前應該存在」的標案集合
-    current_tender_keys = set()
-    new_tenders = []  # 用於通知
 
-    # 4. 處理每個候選標案
-    logger.info("\n處理候選標案...")
-    for idx, tender in enumerate(all_candidates, 1):
-        key = (tender['unit_id'], tender['job_number'])
-        current_tender_keys.add(key)
+# ============================================================
+# 執行模式
+# ============================================================
 
-        # 檢查是否為新案
-        if is_new_tender(tender['unit_id'], tender['job_number']):
-            logger.info(f"  [{idx}/{len(all_candidates)}] 新案: {tender['brief'][:50]}...")
+def sync_mode(resume=False, time_budget=None, days_to_search=DEEP_MODE_DAYS):
+    """
+    同步模式：每天完整同步 14 天資料（days_to_search 較短時為快速輪詢，只收新案、不歸檔）
 
-            # 查詢詳細資料
-            result = get_tender_detail(tender['unit_id'], tender['job_number'])
+    以管線方式執行，各階段同時進行、以有界佇列銜接：
+    /listbydate 逐日列表 → 關鍵字過濾 → 去重 → 新案檢查 → 詳細資料 → 預算/截止日期過濾 → 批次儲存
+    最近一天的新案不必等 14 天列表全部下載完才開始查詢詳細資料。
+    缺少 URL 或機關名稱的舊標案回填與管線同時進行；全部完成後才歸檔不在掃描結果中的標案並發送通知。
 
-            if result is None:
-                logger.warning(f"    無法取得完整資訊，跳過")
-                continue
+    進度寫入 sync_runs 檢查點（已掃描日期與候選標案、已儲存新案；詳細資料已在 tender_detail_cache）。
+    resume=True 時接續 SYNC_RESUME_MAX_AGE_HOURS 內未完成的同步（跨日時該次開始當天起的列表重新掃描）：已掃描的日期不再下載，已儲存的新案不再查詢。
+    14 天列表全部掃描完成後才執行歸檔，避免漏掃的日期被誤判為已結束；
+    新案則不論掃描是否完成都會通知（以 tenders.notified 追蹤，未通知者下次同步一併推播）。
 
-            budget, pk_pms_main, deadline, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary, unit_name = result
+    time_budget（秒）：新案以 PRIORITY_WINDOW 筆的優先佇列依急迫程度排序（見 detail_urgency）後查詢詳細資料，
+    預算扣除 TIME_BUDGET_RESERVE 後停止送出查詢；略過的新案記入 deferred_details，下次同步優先查詢。
+    """
+    sync_started = time.monotonic()
+    full_scan = days_to_search >= DEEP_MODE_DAYS
+    logger.info("="*60)
+    logger.info(f"執行模式：{'資料同步' if full_scan else '快速輪詢'}")
+    logger.info("="*60)
 
-            # 預算過濾
-            if not (MIN_BUDGET <= budget <= MAX_BUDGET):
-                logger.debug(f"    預算不符 (${budget:,})")
-                continue
+    today = datetime.now()
+    run_date = today.strftime('%Y-%m-%d')
+    target_dates = [today - timedelta(days=days_ago) for days_ago in range(days_to_search)]
+    list_dates = [d.strftime('%Y-%m-%d') for d in target_dates]
+
+    checkpoint = {}
+    resumable = find_resumable_sync_run(days_to_search) if resume else None
+    if resumable is not None:
+        run_id, previous_run_date = resumable
+        if previous_run_date != run_date:
+            logger.info(f"續跑 {previous_run_date} 開始的同步，該日起的列表重新掃描")
+            rebase_sync_run(run_id, previous_run_date, run_date)
+        checkpoint = {
+            list_date: candidates for list_date, candidates in load_sync_checkpoint(run_id).items()
+            if list_date in list_dates
+        }
+        logger.info(f"續跑同步 run #{run_id}：已掃描 {len(checkpoint)}/{days_to_search} 天")
+    else:
+        if resume:
+            logger.info(f"沒有 {SYNC_RESUME_MAX_AGE_HOURS} 小時內未完成的同步紀錄，重新開始")
+        run_id = start_sync_run(run_date, days_to_search)
 
-            # 截止日期檢查
-            try:
-                deadline_dt = datetime.strptime(deadline, "%Y-%m-%d %H:%M:%S")
-                if deadline_dt < datetime.now():
-                    logger.debug(f"    已截止")
-                    continue
-            except:
-                logger.debug(f"    截止日期格式錯誤")
-                continue
+    # 1. 舊標案回填（與管線同時進行）
+    logger.info("\n檢查並回填缺少 URL 或機關名稱的標案...")
+    backfill_thread = threading.Thread(target=backfill_missing_details, name='backfill', daemon=True)
+    backfill_thread.start()
+
+    # 2. 同步管線
+    logger.info(f"\n開始掃描最近 {days_to_search} 天標案（管線佇列上限: {PIPELINE_QUEUE_SIZE}）...")
+    started = time.monotonic()
+
+    cache_stats = {'hit': 0, 'revalidated': 0, 'miss': 0, 'checkpoint': 0}
+    scan_stats = {'candidates': 0, 'duplicates': 0, 'skipped_rejected': 0, 'detail_requested': 0, 'detail_found': 0}
+    current_tender_keys = set()  # 「當前應該存在」的標案，歸檔比對用
+    rejections = load_rejections()
+    new_rejections = {}
+    deferred = []  # 時間預算用盡而未查詢的新案
+
+    stages = [
+        partial(filter_listing_days, scan_stats=scan_stats, run_id=run_id),
+        partial(dedupe_candidate_days, seen_keys=current_tender_keys, scan_stats=scan_stats),
+        partial(select_new_candidates, rejections=rejections, scan_stats=scan_stats),
+    ]
+    stop_at = None
+    if time_budget:
+        stop_at = sync_started + max(0, time_budget - TIME_BUDGET_RESERVE)
+        logger.info(f"時間預算 {time_budget:.0f} 秒（預留 {TIME_BUDGET_RESERVE} 秒），詳細資料依急迫程度查詢")
+        stages.append(partial(prioritize_new_candidates, deferred_keys=load_deferred_keys()))
+    stages += [
+        partial(submit_detail_requests, stop_at=stop_at),
+        partial(filter_tender_details, new_rejections=new_rejections, scan_stats=scan_stats, deferred=deferred),
+    ]
+    pipeline = run_pipeline(partial(iter_listing_days, target_dates, cache_stats, checkpoint), *stages)
+
+    # 3. 批次儲存（在主執行緒消費管線輸出）
+    saved_count = 0
+    batch = []
+    try:
+        for tender in pipeline:
+            batch.append(tender)
+            if len(batch) >= SAVE_BATCH_SIZE:
+                saved_count += save_tender_batch(batch)
+                batch = []
+        saved_count += save_tender_batch(batch)
+    finally:
+        backfill_thread.join()
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"\n總計候選標案: {scan_stats['candidates']} 筆，移除跨日重複公告 {scan_stats['duplicates']} 筆，"
+        f"不重複 {len(current_tender_keys)} 筆"
+    )
+    logger.info(
+        f"列表快取：命中 {cache_stats['hit']} 天，重新驗證未變更 {cache_stats['revalidated']} 天，"
+        f"下載 {cache_stats['miss']} 天，檢查點還原 {cache_stats['checkpoint']} 天"
+    )
+    if scan_stats['skipped_rejected']:
+        logger.info(f"跳過 {scan_stats['skipped_rejected']} 筆先前已淘汰且公告未變更的候選標案")
+    logger.info(
+        f"詳細資料：{scan_stats['detail_found']}/{scan_stats['detail_requested']} 筆，"
+        f"同步管線耗時 {elapsed:.1f} 秒，目前 API 速率 {api_limiter.rate:.2f} 次/秒"
+    )
 
-            logger.info(f"    ✓ 符合條件! 預算: ${budget:,}, 截止: {deadline}")
+    save_rejections(list(new_rejections.values()))
+    if new_rejections:
+        logger.info(f"記錄 {len(new_rejections)} 筆淘汰候選（預算或截止日期不符）")
+
+    update_deferred_details(current_tender_keys, deferred)
+    if deferred:
+        logger.warning(f"時間預算用盡：{len(deferred)} 筆新案延後至下次同步優先查詢")
 
-            # 儲存新標案
-            if save_tender(
-                unit_id=tender['unit_id'],
-                job_number=tender['job_number'],
-                brief=tender['brief'],
-                unit_name=unit_name or tender.get('unit_name', ''),  # 優先使用 API 取得的機關名稱
-                budget=budget,
-                pk_pms_main=pk_pms_main,
-                deadline=deadline,
-                url=url,
-                award_type=award_type,
-                is_electronic=is_electronic,
-                requires_deposit=requires_deposit,
-                contract_duration=contract_duration,
-                qualification_summary=qualification_summary
-            ):
-                new_tenders.append({
-                    'brief': tender['brief'],
-                    'unit': unit_name or tender.get('unit_name', ''),  # 優先使用 API 取得的機關名稱
-                    'budget': budget,
-                    'deadline': deadline,
-                    'pk_pms_main': pk_pms_main,
-                    'url': url,
-                    'award_type': award_type,
-                    'is_electronic': is_electronic,
-                    'requires_deposit': requires_deposit,
-                    'contract_duration': contract_duration,
-                    'qualification_summary': qualification_summary
-                })
+    scanned_days = count_scanned_days(run_id, list_dates)
+    scan_complete = scanned_days >= days_to_search
+    if not scan_complete:
+        logger.warning(
+            f"列表掃描未完成（{scanned_days}/{days_to_search} 天），略過歸檔；"
+            f"本次已儲存 {saved_count} 筆新案照常通知，可用 --resume 續跑"
+        )
+    elif not current_tender_keys:
+        logger.info("未找到符合條件的標案，略過歸檔")
+    else:
+        prune_listbydate_cache()
+        prune_tender_detail_cache()
 
     # 4. 刪除資料庫中不在 current_tender_keys 的標案（已結束/過期）
-    logger.info("\n檢查需要清理的標案...")
-    deleted_count = 0
+    #    快速輪詢只掃描最近幾天、列表掃描未完成時有漏掃的日期，不在結果中不代表已結束，歸檔留給完整同步；
+    #    掃描結果為空多半是 API 異常，不據以歸檔全部標案
+    if full_scan and scan_complete and current_tender_keys:
+        logger.info("\n檢查需要清理的標案...")
+        deleted_count = archive_missing_tenders(current_tender_keys)
+    else:
+        deleted_count = 0
 
+    # 5. 預先計算分類、推薦評分與每日統計（日報與查詢工具直接讀取）
+    refresh_tender_classification()
+    refresh_tender_scores()
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
-                       date_added, notified, status, publish_date, last_checked, last_status_change
-                FROM tenders
-            """)
-            all_db_tenders = cursor.fetchall()
-
-            for row in all_db_tenders:
-                (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
-                 date_added, notified, status, publish_date, last_checked, last_status_change) = row
-                if (unit_id, job_number) not in current_tender_keys:
-                    archived_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    archive_reason = "not_in_current_scan"
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO tenders_archive (
-                            unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
-                            date_added, notified, status, publish_date, last_checked, last_status_change,
-                            archived_at, archive_reason
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline,
-                        date_added, notified, status, publish_date, last_checked, last_status_change,
-                        archived_at, archive_reason
-                    ))
-                    cursor.execute(
-                        "DELETE FROM tenders WHERE unit_id = ? AND job_number = ?",
-                        (unit_id, job_number)
-                    )
-                    deleted_count += 1
-                    logger.info(f"  刪除: {brief[:40]}...")
-
-            conn.commit()
-    except Exception as e:
-        logger.error(f"清理標案失敗: {e}")
+        stats = update_daily_stats()
+    except sqlite3.Error as e:
+        logger.error(f"寫入每日統計失敗: {e}")
+        stats = {'active_count': count_active_tenders()}
 
-    # 5. 統計結果
-    active_count = count_active_tenders()
+    # 尚未通知的新案（含先前中斷或未完成的同步所儲存者）；通知後標記 notified，不會重複推播
+    new_tenders = load_unnotified_tenders()
+    if scan_complete:
+        finish_sync_run(run_id)
 
     logger.info("\n" + "="*60)
-    logger.info("同步完成")
+    logger.info("同步完成" if scan_complete else "同步未完成（已儲存的新案照常通知）")
     logger.info(f"新增標案：{len(new_tenders)} 筆")
     logger.info(f"刪除標案：{deleted_count} 筆")
-    logger.info(f"目前追蹤：{active_count} 筆活躍標案")
+    logger.info(f"目前追蹤：{stats['active_count']} 筆活躍標案")
     logger.info("="*60)
 
-    # 6. 發送通知（僅新案）
+    # 6. 發送通知（僅新案）；推播失敗者保留 notified = 0，下次同步再通知
     if new_tenders and LINE_CHANNEL_ACCESS_TOKEN and LINE_USER_ID:
         message = format_line_notification(
             mode='sync',
             new_tenders=new_tenders
         )
-        send_line_message(message)
+        if send_line_message(message):
+            mark_tenders_notified(new_tenders)
     elif new_tenders:
         logger.info("💡 提示：設定 LINE_CHANNEL_ACCESS_TOKEN 和 LINE_USER_ID 環境變數即可啟用推播通知")
+        mark_tenders_notified(new_tenders)
+
+    log_connection_stats()
+
+
+# 已儲存的分類（tender_type / priority / exclusion_reason）若版本不同即視為過期；
+# 調整 classify_tender_type 的關鍵字或 classify_tender 的規則後請遞增
+CLASSIFICATION_VERSION = 1
 
 
 def classify_tender_type(brief):
@@ -1171,291 +2649,730 @@ def classify_tender_type(brief):
     return 'other'
 
 
-def report_mode():
+def classify_tender(brief, budget):
     """
-    日報生成模式（每天 20:00 執行）
+    標案分類與日報優先級
 
-    - 從資料庫讀取當天新增/歸檔標案
-    - 生成 Markdown 日報
-    - Git 提交到 reports/
+    Returns:
+        tuple: (tender_type, priority, exclusion_reason)
+            priority: 'high'（維護案 + 預算 ≤ 50萬）、'attention'（開發案 + 預算 ≤ 50萬）、'other'（其他）
+            exclusion_reason: 歸入 'other' 的原因（預算超出、非軟體類、類型不符）
     """
-    logger.info("="*60)
-    logger.info("執行模式：日報生成")
-    logger.info("="*60)
+    tender_type = classify_tender_type(brief)
+    budget = budget or 0
+    is_affordable = budget <= 500000
+
+    # 計算不符合原因（用於「其他」分類）
+    exclusion_reasons = []
+    if budget > 500000:
+        exclusion_reasons.append('預算超出')
+    if tender_type in ['procurement', 'engineering']:
+        exclusion_reasons.append('非軟體類')
+    if tender_type == 'other':
+        exclusion_reasons.append('類型不符')
+
+    # 分類邏輯
+    if tender_type == 'maintenance' and is_affordable:
+        priority = 'high'
+    elif tender_type == 'development' and is_affordable:
+        priority = 'attention'
+    else:
+        priority = 'other'
+
+    return tender_type, priority, '、'.join(exclusion_reasons)
 
-    from datetime import datetime
-    from pathlib import Path
 
-    today = datetime.now().strftime('%Y-%m-%d')
+# ===== 每日統計 =====
 
-    # 1. 查詢所有活躍標案（未截止）
-    logger.info("\n查詢所有活躍標案...")
+def refresh_tender_classification():
+    """為尚未分類或分類版本過期的標案寫入 tender_type / priority / exclusion_reason，回傳更新筆數"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT brief, budget, deadline, unit_name, url, award_type, is_electronic, requires_deposit, contract_duration, qualification_summary
-                FROM tenders
-                WHERE datetime(deadline) > datetime('now')
-                ORDER BY budget DESC
-            """)
-            new_today = [
-                {
-                    'brief': row[0],
-                    'budget': row[1],
-                    'deadline': row[2],
-                    'unit': row[3],
-                    'url': row[4],
-                    'award_type': row[5] or '',
-                    'is_electronic': row[6] or 0,
-                    'requires_deposit': row[7] or 0,
-                    'contract_duration': row[8] or '',
-                    'qualification_summary': row[9] or ''
-                }
-                for row in cursor.fetchall()
-            ]
-    except Exception as e:
-        logger.error(f"查詢活躍標案失敗: {e}")
-        new_today = []
+        with get_db() as conn:
+            rows = conn.execute("""
+                SELECT unit_id, job_number, brief, budget FROM tenders
+                WHERE classification_version IS NULL OR classification_version != ?
+            """, (CLASSIFICATION_VERSION,)).fetchall()
+            conn.executemany("""
+                UPDATE tenders
+                SET tender_type = ?, priority = ?, exclusion_reason = ?, classification_version = ?
+                WHERE unit_id = ? AND job_number = ?
+            """, [
+                classify_tender(brief, budget) + (CLASSIFICATION_VERSION, unit_id, job_number)
+                for unit_id, job_number, brief, budget in rows
+            ])
+        if rows:
+            logger.debug(f"標案分類：更新 {len(rows)} 筆（分類版本 v{CLASSIFICATION_VERSION}）")
+        return len(rows)
+    except sqlite3.Error as e:
+        logger.error(f"更新標案分類失敗: {e}")
+        return 0
 
-    # 1.5. 單獨統計今日新增數量（用於統計摘要）
-    new_today_count = 0
+
+def _fetch_missing_tender_records(key):
+    """重新查詢快取已被清除的標案 /tender records，失敗時回傳 None"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM tenders WHERE date(date_added) = date('now')")
-            new_today_count = cursor.fetchone()[0]
+        return fetch_tender_records(*key, max_age_hours=0)
     except Exception as e:
-        logger.error(f"統計今日新增標案失敗: {e}")
+        logger.warning(f"重新查詢標案詳細資料失敗 ({key[0]}/{key[1]}): {e}")
+        return None
+
 
-    # 2. 查詢當天歸檔的標案（archived_at = today）
-    logger.info("查詢今日歸檔標案...")
+def refresh_tender_scores(max_workers=DETAIL_CONCURRENCY):
+    """
+    為尚未評分或評分版本過期的標案寫入 score / difficulty / competition，回傳更新筆數
+
+    detail 取自同步時已寫入的 tender_detail_cache（不論新舊）；快取已不存在的標案重新查詢，
+    查詢失敗者保留原評分與版本、下次同步再試，避免與有 detail 的標案評分基準不一致。
+    SCORING_VERSION 變更時整表重新評分。
+    """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT brief, budget, archive_reason
-                FROM tenders_archive
-                WHERE date(archived_at) = date('now')
-                ORDER BY budget DESC
-            """)
-            archived_today = [
-                {'brief': row[0], 'budget': row[1], 'reason': row[2]}
-                for row in cursor.fetchall()
-            ]
-    except Exception as e:
-        logger.error(f"查詢今日歸檔標案失敗: {e}")
-        archived_today = []
+        with get_db() as conn:
+            rows = conn.execute("""
+                SELECT unit_id, job_number, brief, budget, unit_name FROM tenders
+                WHERE scoring_version IS NULL OR scoring_version != ?
+            """, (SCORING_VERSION,)).fetchall()
+
+        records = {}
+        for unit_id, job_number, *_ in rows:
+            payload = get_cached_tender_payload(unit_id, job_number, max_age_hours=None)
+            if payload is not None:
+                records[(unit_id, job_number)] = payload.get('records') or []
+        missing = [(unit_id, job_number) for unit_id, job_number, *_ in rows if (unit_id, job_number) not in records]
+        if missing:
+            logger.info(f"推薦評分：{len(missing)} 筆缺少詳細資料快取，重新查詢")
+            with db_thread_pool(max_workers) as executor:
+                fetched = dict(zip(missing, executor.map(_fetch_missing_tender_records, missing)))
+            records.update((key, value) for key, value in fetched.items() if value is not None)
+
+        updates = []
+        for unit_id, job_number, brief, budget, unit_name in rows:
+            if (unit_id, job_number) not in records:
+                continue
+            detail = select_tender_detail(records[(unit_id, job_number)])
+            analysis = analyze_tender(brief, budget or 0, unit_name, detail)
+            updates.append((analysis['score'], analysis['difficulty'], analysis['competition'],
+                            SCORING_VERSION, unit_id, job_number))
+
+        with get_db() as conn:
+            conn.executemany("""
+                UPDATE tenders
+                SET score = ?, difficulty = ?, competition = ?, scoring_version = ?
+                WHERE unit_id = ? AND job_number = ?
+            """, updates)
+        if rows:
+            skipped = len(rows) - len(updates)
+            skipped_note = f"，{skipped} 筆無法取得詳細資料、下次同步再試" if skipped else ""
+            logger.info(f"推薦評分：更新 {len(updates)} 筆（評分版本 v{SCORING_VERSION}）{skipped_note}")
+        return len(updates)
+    except sqlite3.Error as e:
+        logger.error(f"更新推薦評分失敗: {e}")
+        return 0
 
-    # 3. 統計目前活躍標案
-    active_count = count_active_tenders()
 
-    # 4. 生成 Markdown 日報
-    logger.info("\n生成日報...")
-    report = f"""# 政府標案監控日報
+def update_daily_stats(stat_date=None):
+    """
+    計算並寫入當日統計（同一天重複同步時覆寫），回傳統計 dict
 
-**日期**: {today}
-**生成時間**: {datetime.now().strftime('%H:%M:%S')}
+    新增/移除數以 date_added_ts、archived_at_ts 索引範圍計數，不需掃描歸檔表。
+    """
+    stat_date = stat_date or datetime.now().strftime('%Y-%m-%d')
+    day_start = to_epoch(datetime.strptime(stat_date, '%Y-%m-%d'))
+    day_end = day_start + 86400
+    now = datetime.now()
+
+    stats = {'stat_date': stat_date}
+    with get_db() as conn:
+        cursor = conn.cursor()
+        stats['new_count'] = cursor.execute(
+            "SELECT COUNT(*) FROM tenders WHERE date_added_ts >= ? AND date_added_ts < ?",
+            (day_start, day_end)
+        ).fetchone()[0]
+        stats['removed_count'] = cursor.execute(
+            "SELECT COUNT(*) FROM tenders_archive WHERE archived_at_ts >= ? AND archived_at_ts < ?",
+            (day_start, day_end)
+        ).fetchone()[0]
+        stats['active_count'] = cursor.execute("SELECT COUNT(*) FROM tenders").fetchone()[0]
+
+        priority_counts = dict(cursor.execute(
+            "SELECT priority, COUNT(*) FROM tenders WHERE deadline_ts > ? GROUP BY priority",
+            (to_epoch(now),)
+        ).fetchall())
+        stats['open_count'] = sum(priority_counts.values())
+        stats['high_priority_count'] = priority_counts.get('high', 0)
+        stats['attention_count'] = priority_counts.get('attention', 0)
+        stats['other_count'] = stats['open_count'] - stats['high_priority_count'] - stats['attention_count']
+        stats['synced_at'] = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO daily_stats ({', '.join(stats)})
+            VALUES ({', '.join('?' * len(stats))})
+        """, list(stats.values()))
+
+    return stats
+
+
+def load_daily_stats():
+    """讀取最近一次同步寫入的每日統計，沒有任何紀錄時回傳 None"""
+    with get_db() as conn:
+        cursor = conn.execute("SELECT * FROM daily_stats ORDER BY stat_date DESC LIMIT 1")
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([d[0] for d in cursor.description], row))
 
----
 
-## 📊 統計摘要
+# ===== 日報資料模型 =====
 
-- ✨ 今日新增：**{new_today_count}** 筆
-- 🔄 今日移除：**{len(archived_today)}** 筆
-- 📌 目前追蹤：**{active_count}** 筆活躍標案
+# 活躍標案排序：預算高者在前，同預算依截止時間與代碼排序（輸出穩定，內容雜湊才可比較）
+REPORT_TENDER_ORDER = "budget DESC, deadline_ts, unit_id, job_number"
 
----
 
-"""
+def assemble_report_model(today, generated_at, stats, tender_rows, archived_rows, now):
+    """
+    整理日報資料模型（格式見 report_formats）
 
-    # 新增標案：分類呈現
-    if new_today:
-        # 分類標案
-        high_priority = []  # 維護案 + 預算 ≤ 50萬
-        worth_attention = []  # 開發案 + 預算 ≤ 50萬
-        others = []  # 其他（預算太高或非軟體類）
-
-        for tender in new_today:
-            tender_type = classify_tender_type(tender['brief'])
-            budget = tender.get('budget', 0)
-            is_affordable = budget <= 500000
-
-            # 計算不符合原因（用於「其他」分類）
-            exclusion_reasons = []
-            if budget > 500000:
-                exclusion_reasons.append('預算超出')
-            if tender_type in ['procurement', 'engineering']:
-                exclusion_reasons.append('非軟體類')
-            if tender_type == 'other':
-                exclusion_reasons.append('類型不符')
-
-            # 將不符原因加入 tender 字典
-            tender['exclusion_reason'] = '、'.join(exclusion_reasons) if exclusion_reasons else ''
-            tender['tender_type'] = tender_type
-
-            # 分類邏輯
-            if tender_type == 'maintenance' and is_affordable:
-                high_priority.append(tender)
-            elif tender_type == 'development' and is_affordable:
-                worth_attention.append(tender)
-            else:
-                others.append(tender)
+    Args:
+        stats: 含 stat_date、new_count、removed_count、active_count
+        tender_rows: 已排序的活躍標案 (unit_id, job_number, brief, budget, deadline, unit_name, url,
+                     tender_type, priority, exclusion_reason)
+        archived_rows: 已排序的歸檔標案 (brief, budget, archive_reason)
+        now: 計算剩餘天數的基準時間
+    """
+    model = {
+        'date': today,
+        'generated_at': generated_at,
+        'stat_date': stats['stat_date'],
+        'stats': {
+            'new_count': stats['new_count'],
+            'removed_count': stats['removed_count'],
+            'active_count': stats['active_count'],
+        },
+        'sections': {priority: [] for priority in report_formats.SECTION_ORDER},
+        'archived': [
+            {'brief': brief, 'budget': budget, 'reason': reason}
+            for brief, budget, reason in archived_rows
+        ],
+    }
 
-        # 高優先級標案
-        if high_priority:
-            report += "## 🔥 高優先級：維護案（預算 ≤ 50萬）\n\n"
-            for idx, tender in enumerate(high_priority, 1):
-                report += f"### {idx}. {tender['brief']}\n\n"
+    for unit_id, job_number, brief, budget, deadline, unit_name, url, tender_type, priority, exclusion_reason in tender_rows:
+        try:
+            days_left = (datetime.strptime(deadline, "%Y-%m-%d %H:%M:%S") - now).days
+        except (TypeError, ValueError):
+            days_left = None
+        section = priority if priority in model['sections'] else 'other'
+        model['sections'][section].append({
+            'unit_id': unit_id,
+            'job_number': job_number,
+            'brief': brief,
+            'budget': budget,
+            'deadline': deadline,
+            'days_left': days_left,
+            'unit': unit_name,
+            'url': url,
+            'tender_type': tender_type,
+            'priority': section,
+            'exclusion_reason': exclusion_reason or '',
+        })
+
+    return model
+
+
+def build_report_model(conn, today, stats, now):
+    """
+    查詢日報資料（活躍標案依預先計算的 priority 分區、最近一次同步的歸檔標案）並整理為模型
 
-                # 基本資訊
-                report += "**💰 預算**：${:,}\n".format(tender['budget'])
+    所有輸出格式共用此模型，資料庫只查詢一次。
+    """
+    tender_rows = conn.execute(f"""
+        SELECT unit_id, job_number, brief, budget, deadline, unit_name, url,
+               tender_type, priority, exclusion_reason
+        FROM tenders
+        WHERE deadline_ts > ?
+        ORDER BY {REPORT_TENDER_ORDER}
+    """, (to_epoch(now),)).fetchall()
 
-                # 計算剩餘天數與緊急標示
-                try:
-                    deadline_dt = datetime.strptime(tender['deadline'], "%Y-%m-%d %H:%M:%S")
-                    days_left = (deadline_dt - datetime.now()).days
-                    if days_left <= 3:
-                        days_tag = f"剩 {days_left} 天 🔥"
-                    elif days_left <= 7:
-                        days_tag = f"剩 {days_left} 天 ⚡"
-                    else:
-                        days_tag = f"剩 {days_left} 天"
-                except:
-                    days_tag = "未知"
-
-                report += f"**⏰ 截止**：{tender['deadline'][:10]}（{days_tag}）\n"
-                report += f"**🏢 機關**：{tender['unit']}\n"
-                report += f"**🔗 連結**：[查看詳情]({tender['url']})\n\n"
-
-                # 案件特性
-                report += "**📋 案件特性**\n"
-                report += "- ✅ 類型：年度維護案（重複性高）\n"
-                report += "- ✅ 適合能力：系統維護/運維\n"
-                report += "- ✅ 風險評估：低風險，穩定收入\n\n"
-
-                report += "---\n\n"
-
-        # 值得關注的標案
-        if worth_attention:
-            report += "## ⚡ 值得關注：開發案（預算 ≤ 50萬）\n\n"
-            for idx, tender in enumerate(worth_attention, 1):
-                report += f"### {idx}. {tender['brief']}\n\n"
-
-                # 基本資訊
-                report += "**💰 預算**：${:,}\n".format(tender['budget'])
-
-                # 計算剩餘天數與緊急標示
-                try:
-                    deadline_dt = datetime.strptime(tender['deadline'], "%Y-%m-%d %H:%M:%S")
-                    days_left = (deadline_dt - datetime.now()).days
-                    if days_left <= 3:
-                        days_tag = f"剩 {days_left} 天 🔥"
-                    elif days_left <= 7:
-                        days_tag = f"剩 {days_left} 天 ⚡"
-                    else:
-                        days_tag = f"剩 {days_left} 天"
-                except:
-                    days_tag = "未知"
-
-                report += f"**⏰ 截止**：{tender['deadline'][:10]}（{days_tag}）\n"
-                report += f"**🏢 機關**：{tender['unit']}\n"
-                report += f"**🔗 連結**：[查看詳情]({tender['url']})\n\n"
-
-                # 案件特性
-                report += "**📋 案件特性**\n"
-                report += "- ⚡ 類型：新系統開發\n"
-                report += "- ⚡ 適合能力：新系統開發\n"
-                report += "- ⚠️ 風險評估：中風險，有後續維護機會\n\n"
-
-                report += "---\n\n"
-
-        # 其他標案
-        if others:
-            report += "## 📌 其他標案\n\n"
-            report += "| 標案名稱 | 預算 | 不符原因 | 截止日期 | 連結 |\n"
-            report += "|---------|------|----------|----------|------|\n"
-
-            for tender in others:
-                brief = tender['brief'][:60] + '...' if len(tender['brief']) > 60 else tender['brief']
-                budget = f"${tender['budget']:,}"
-                exclusion_reason = tender.get('exclusion_reason', '未分類')
-                deadline = tender['deadline'][:10] if tender.get('deadline') else 'N/A'
-                link = f"[查看]({tender['url']})" if tender.get('url') else 'N/A'
-                report += f"| {brief} | {budget} | {exclusion_reason} | {deadline} | {link} |\n"
-
-            report += "\n"
-    else:
-        report += "## ✨ 今日新增標案\n\n無新增標案。\n\n"
+    # 最近一次同步當天歸檔的標案
+    stat_start = to_epoch(datetime.strptime(stats['stat_date'], '%Y-%m-%d'))
+    archived_rows = conn.execute("""
+        SELECT brief, budget, archive_reason
+        FROM tenders_archive
+        WHERE archived_at_ts >= ? AND archived_at_ts < ?
+        ORDER BY budget DESC, unit_id, job_number
+    """, (stat_start, stat_start + 86400)).fetchall()
 
-    # 移除標案
-    if archived_today:
-        report += "## 🔄 今日移除標案\n\n"
-        report += "| 標案名稱 | 預算 | 移除原因 |\n"
-        report += "|---------|------|----------|\n"
+    return assemble_report_model(today, now.strftime('%H:%M:%S'), stats, tender_rows, archived_rows, now)
 
-        for tender in archived_today:
-            brief = tender['brief'][:50] + '...' if len(tender['brief']) > 50 else tender['brief']
-            budget = f"${tender['budget']:,}"
-            reason = tender['reason']
-            report += f"| {brief} | {budget} | {reason} |\n"
 
-        report += "\n"
-    else:
-        report += "## 🔄 今日移除標案\n\n無移除標案。\n\n"
+# ===== 歷史日報重新生成 =====
+
+# 重新生成歷史日報的平行程序數
+REPORT_REGEN_WORKERS = os.cpu_count() or 2
+
+# 工作程序共用的資料（由 _init_regen_worker 設定，每個程序只傳送一次）
+_regen_rows = None
+_regen_daily_stats = None
+_regen_options = None
+
+
+def load_report_history(since, until):
+    """
+    一次讀取重建 since ~ until 日報所需的現行與歸檔標案（皆走 *_ts 索引）
 
-    report += "---\n\n"
-    report += "*此報告由政府標案監控系統自動生成*\n"
+    日報日期 D 呈現 D 00:00 當下的狀態，摘要統計取前一天（最近一次同步）；
+    因此歸檔資料需從 since 前一天開始。依 key 排序，同一標案的現行與歸檔列相鄰、順序固定。
+
+    Returns:
+        list: (unit_id, job_number, brief, budget, deadline, unit_name, url,
+               date_added_ts, deadline_ts, archived_at_ts, archive_reason)
+    """
+    since_start = to_epoch(since)
+    until_end = to_epoch(until) + 86400
+
+    with get_db() as conn:
+        return conn.execute("""
+            SELECT unit_id, job_number, brief, budget, deadline, unit_name, url,
+                   date_added_ts, deadline_ts, NULL, NULL
+            FROM tenders
+            WHERE date_added_ts < ?
+            UNION ALL
+            SELECT unit_id, job_number, brief, budget, deadline, unit_name, url,
+                   date_added_ts, deadline_ts, archived_at_ts, archive_reason
+            FROM tenders_archive
+            WHERE archived_at_ts >= ? AND date_added_ts < ?
+            ORDER BY unit_id, job_number, date_added_ts
+        """, (until_end, since_start - 86400, until_end)).fetchall()
+
+
+def _regen_row_rank(row):
+    """同一標案在某日同時有現行與歸檔列時的取捨順序：date_added_ts 較新者優先，相同時現行列優先"""
+    added_ts, archived_ts = row[7], row[9]
+    return (added_ts, archived_ts is None)
+
+
+def _init_regen_worker(rows, daily_stats, options):
+    global _regen_rows, _regen_daily_stats, _regen_options
+    _regen_rows = rows
+    _regen_daily_stats = daily_stats
+    _regen_options = options
+
+
+def _regenerate_report_day(report_date):
+    """
+    工作程序：以共用資料重建單日日報（分類於此重新計算），回傳 [(格式, 檔案路徑, 是否寫入)]
+    """
+    as_of = datetime.strptime(report_date, '%Y-%m-%d')
+    as_of_ts = to_epoch(as_of)
+    stat_date = (as_of - timedelta(days=1)).strftime('%Y-%m-%d')
+    stat_start = as_of_ts - 86400
+
+    present = {}
+    archived_rows = []
+    new_count = 0
+    for row in _regen_rows:
+        unit_id, job_number, brief, budget, deadline, unit_name, url, added_ts, deadline_ts, archived_ts, reason = row
+        if added_ts is not None and stat_start <= added_ts < as_of_ts:
+            new_count += 1
+        if archived_ts is not None and stat_start <= archived_ts < as_of_ts:
+            archived_rows.append(row)
+        if added_ts is not None and added_ts < as_of_ts and (archived_ts is None or archived_ts >= as_of_ts):
+            # 歸檔後重新出現的標案同時有現行與歸檔列，明確取其一（見 _regen_row_rank）
+            key = (unit_id, job_number)
+            if key not in present or _regen_row_rank(row) > _regen_row_rank(present[key]):
+                present[key] = row
+
+    stats = _regen_daily_stats.get(stat_date) or {
+        'stat_date': stat_date,
+        'new_count': new_count,
+        'removed_count': len(archived_rows),
+        'active_count': len(present),
+    }
+
+    open_rows = sorted(
+        (row for row in present.values() if row[8] is not None and row[8] > as_of_ts),
+        key=lambda row: (-(row[3] or 0), row[8], row[0], row[1])
+    )
+    tender_rows = [
+        row[:7] + classify_tender(row[2], row[3])
+        for row in open_rows
+    ]
+    archived_rows.sort(key=lambda row: (-(row[3] or 0), row[0], row[1]))
+
+    model = assemble_report_model(
+        report_date,
+        _regen_options['generated_at'],
+        stats,
+        tender_rows,
+        [(row[2], row[3], row[10]) for row in archived_rows],
+        as_of
+    )
+    return report_formats.write_report(model, _regen_options['reports_dir'], _regen_options['formats'])
+
+
+def regenerate_reports(since, until, formats=None, max_workers=REPORT_REGEN_WORKERS):
+    """
+    以 tenders 與 tenders_archive 重建 since ~ until 每一天的日報
+
+    資料只查詢一次，各日期交由平行工作程序重新分類與輸出；內容未變更的檔案不覆寫。
+
+    Returns:
+        list: 有寫入的檔案路徑
+    """
+    rows = load_report_history(since, until)
+    with get_db() as conn:
+        cursor = conn.execute("SELECT * FROM daily_stats WHERE stat_date >= ? AND stat_date <= ?", (
+            (since - timedelta(days=1)).strftime('%Y-%m-%d'), until.strftime('%Y-%m-%d')
+        ))
+        columns = [d[0] for d in cursor.description]
+        daily_stats = {row[0]: dict(zip(columns, row)) for row in cursor}
 
-    # 5. 儲存日報
     reports_dir = Path("reports")
     reports_dir.mkdir(exist_ok=True)
+    options = {
+        'formats': formats or REPORT_FORMATS,
+        'reports_dir': str(reports_dir),
+        'generated_at': datetime.now().strftime('%H:%M:%S'),
+    }
+    dates = [
+        (since + timedelta(days=offset)).strftime('%Y-%m-%d')
+        for offset in range((until - since).days + 1)
+    ]
+    logger.info(f"重新生成 {len(dates)} 天日報（{len(rows)} 筆標案資料，{max_workers} 個工作程序）")
+
+    changed_files = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_regen_worker,
+        initargs=(rows, daily_stats, options)
+    ) as executor:
+        for report_date, results in zip(dates, executor.map(_regenerate_report_day, dates, chunksize=8)):
+            written = [str(path) for _, path, changed in results if changed]
+            changed_files.extend(written)
+            logger.debug(f"  {report_date}: {'已更新 ' + str(len(written)) + ' 個檔案' if written else '未變更'}")
+
+    logger.info(f"重新生成完成：{len(changed_files)} 個檔案有變更")
+    return changed_files
+
+
+def commit_reports(changed_files, message):
+    """GIT_AUTO_COMMIT=true 時提交有變更的日報檔案"""
+    if not changed_files:
+        logger.info("日報內容未變更，略過 Git 提交")
+        return
+    if os.getenv("GIT_AUTO_COMMIT", "false").lower() != "true":
+        return
 
-    report_file = reports_dir / f"{today}.md"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+    logger.info("\n執行 Git 自動提交...")
+    try:
+        import subprocess
+        subprocess.run(["git", "add"] + changed_files, check=True)
+        subprocess.run(["git", "commit", "-m", message], check=True)
+        logger.info("Git 提交成功")
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Git 提交失敗: {e}")
 
-    logger.info(f"日報已儲存: {report_file}")
 
-    # 6. Git 自動提交（可選）
-    if os.getenv("GIT_AUTO_COMMIT", "false").lower() == "true":
-        logger.info("\n執行 Git 自動提交...")
+def report_mode(formats=None, since=None, until=None):
+    """
+    日報生成模式（每天 20:00 執行）
+
+    - 讀取最近一次同步寫入的 daily_stats 與預先分類的活躍標案
+    - 以同一份資料輸出各格式日報（預設 REPORT_FORMATS：Markdown、HTML、JSON）
+    - Git 提交到 reports/
+
+    指定 since（與 until，預設今天）時改為重建該期間每一天的歷史日報。
+    """
+    logger.info("="*60)
+    logger.info("執行模式：日報生成")
+    logger.info("="*60)
+
+    from datetime import datetime
+    from pathlib import Path
+
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+
+    if since:
+        until = until or now.replace(hour=0, minute=0, second=0, microsecond=0)
         try:
-            import subprocess
-            subprocess.run(["git", "add", "reports/"], check=True)
-            subprocess.run([
-                "git", "commit", "-m",
-                f"更新日報 {today}\n\n新增 {len(new_today)} 筆，移除 {len(archived_today)} 筆"
-            ], check=True)
-            logger.info("Git 提交成功")
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"Git 提交失敗: {e}")
+            changed_files = regenerate_reports(since, until, formats)
+        except sqlite3.Error as e:
+            logger.error(f"重新生成日報失敗: {e}")
+            return
+        commit_reports(
+            changed_files,
+            f"重新生成日報 {since.strftime('%Y-%m-%d')} ~ {until.strftime('%Y-%m-%d')}\n\n更新 {len(changed_files)} 個檔案"
+        )
+        logger.info("\n" + "="*60)
+        logger.info("日報生成完成")
+        logger.info("="*60)
+        return
+
+    # 1. 讀取最近一次同步的統計（sync_mode 結束時寫入 daily_stats）
+    refresh_tender_classification()
+    try:
+        stats = load_daily_stats() or update_daily_stats()
+    except sqlite3.Error as e:
+        logger.error(f"讀取每日統計失敗: {e}")
+        stats = {'stat_date': today, 'new_count': 0, 'removed_count': 0, 'active_count': 0}
+
+    # 2. 查詢一次日報資料，輸出各格式，內容未變更的檔案不覆寫
+    logger.info("\n生成日報...")
+    reports_dir = Path("reports")
+    reports_dir.mkdir(exist_ok=True)
+
+    try:
+        model = build_report_model(get_db(), today, stats, now)
+    except sqlite3.Error as e:
+        logger.error(f"查詢日報資料失敗: {e}")
+        return
+
+    changed_files = []
+    for fmt, report_file, changed in report_formats.write_report(model, reports_dir, formats or REPORT_FORMATS):
+        if changed:
+            changed_files.append(str(report_file))
+            logger.info(f"日報已儲存: {report_file}")
+        else:
+            logger.info(f"日報內容未變更，略過寫入: {report_file}")
+
+    # 3. Git 自動提交（可選，有檔案變更時）
+    commit_reports(
+        changed_files,
+        f"更新日報 {today}\n\n新增 {report_formats.tender_count(model)} 筆，移除 {len(model['archived'])} 筆"
+    )
 
     logger.info("\n" + "="*60)
     logger.info("日報生成完成")
     logger.info("="*60)
 
 
+# ===== 常駐模式 =====
+
+# 收到 SIGTERM / SIGINT 時設定，排程迴圈在目前工作完成後結束
+_daemon_stop = threading.Event()
+
+
+def _handle_daemon_signal(signum, frame):
+    """第一次收到訊號：目前工作完成後結束；再收到一次則立即終止（同步進度已寫入檢查點）"""
+    name = signal.Signals(signum).name
+    if _daemon_stop.is_set():
+        logger.warning(f"再次收到 {name}，立即結束")
+        raise SystemExit(1)
+    logger.info(f"收到 {name}，目前工作完成後結束（再送一次立即結束）")
+    _daemon_stop.set()
+
+
+def _parse_interval(value):
+    """解析排程間隔（0 表示停用），負數或非有限數值視為格式錯誤"""
+    interval = float(value)
+    if not 0 <= interval < float('inf'):
+        raise ValueError(value)
+    return interval
+
+
+def _parse_time_of_day(value):
+    """解析每日執行時間 HH:MM（空字串表示停用）"""
+    if value:
+        datetime.strptime(value, '%H:%M')
+    return value
+
+
+def _daemon_setting(name, default, parse):
+    """讀取常駐模式環境變數，格式錯誤時記錄警告並改用預設值"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return parse(value.strip())
+    except ValueError:
+        logger.warning(f"環境變數 {name}={value!r} 格式錯誤，改用預設值 {default}")
+        return default
+
+
+def load_daemon_settings():
+    """讀取常駐模式排程設定，回傳 build_daemon_jobs 的關鍵字參數"""
+    return {
+        'sync_interval_hours': _daemon_setting(
+            "DAEMON_SYNC_INTERVAL_HOURS", DAEMON_SYNC_INTERVAL_HOURS, _parse_interval),
+        'poll_interval_minutes': _daemon_setting(
+            "DAEMON_POLL_INTERVAL_MINUTES", DAEMON_POLL_INTERVAL_MINUTES, _parse_interval),
+        'report_time': _daemon_setting("DAEMON_REPORT_TIME", DAEMON_REPORT_TIME, _parse_time_of_day),
+    }
+
+
+def _next_daily_run(time_of_day, now):
+    """回傳 now 之後下一次 HH:MM 的時間"""
+    hour, minute = map(int, time_of_day.split(':'))
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+def build_daemon_jobs(now, sync_interval_hours=DAEMON_SYNC_INTERVAL_HOURS,
+                      poll_interval_minutes=DAEMON_POLL_INTERVAL_MINUTES, report_time=DAEMON_REPORT_TIME):
+    """
+    建立排程工作列表（間隔為 0 或未設定時間的工作停用）
+
+    - sync：啟動時立即執行，之後每 sync_interval_hours 小時（中斷的同步會續跑）
+    - poll：每 poll_interval_minutes 分鐘快速輪詢最近 QUICK_MODE_DAYS 天；完整同步後重新計時
+    - report：每天 report_time 生成日報
+    """
+    jobs = []
+    if sync_interval_hours > 0:
+        jobs.append({
+            'name': 'sync',
+            'func': partial(sync_mode, resume=True),
+            'interval': timedelta(hours=sync_interval_hours),
+            'next_run': now,
+            'resets': ['poll'],
+        })
+    if poll_interval_minutes > 0:
+        poll_interval = timedelta(minutes=poll_interval_minutes)
+        jobs.append({
+            'name': 'poll',
+            'func': partial(sync_mode, days_to_search=QUICK_MODE_DAYS),
+            'interval': poll_interval,
+            'next_run': now + poll_interval,
+            'resets': [],
+        })
+    if report_time:
+        jobs.append({
+            'name': 'report',
+            'func': report_mode,
+            'interval': timedelta(days=1),
+            'next_run': _next_daily_run(report_time, now),
+            'resets': [],
+        })
+    return jobs
+
+
+def run_daemon_job(job, jobs):
+    """執行單一排程工作並安排下一次執行；工作失敗只記錄，不中斷常駐程序"""
+    started = time.monotonic()
+    logger.info(f"\n▶ 排程工作 {job['name']} 開始")
+    try:
+        job['func']()
+    except Exception as e:
+        logger.error(f"排程工作 {job['name']} 失敗: {e}")
+
+    # 把 WAL 內容寫回主資料庫（不等待讀取中的連線），常駐期間 WAL 不會無限成長
+    try:
+        get_db().execute("PRAGMA wal_checkpoint(PASSIVE)")
+    except sqlite3.Error as e:
+        logger.warning(f"資料庫檢查點失敗: {e}")
+
+    now = datetime.now()
+    while job['next_run'] <= now:
+        job['next_run'] += job['interval']
+    for other in jobs:
+        if other['name'] in job['resets']:
+            other['next_run'] = max(other['next_run'], now + other['interval'])
+
+    logger.info(
+        f"◀ 排程工作 {job['name']} 結束，耗時 {time.monotonic() - started:.1f} 秒，"
+        f"下次執行 {job['next_run'].strftime('%Y-%m-%d %H:%M')}"
+    )
+
+
+def daemon_mode():
+    """
+    常駐模式：在同一個程序內依排程執行 sync / poll / report
+
+    資料庫連線、HTTP 連線池（keep-alive）、API 速率狀態與關鍵字自動機在工作之間持續沿用，
+    不必每次重新啟動、遷移資料庫與建立 TLS 連線。收到 SIGTERM 時在目前工作完成後正常結束。
+    """
+    logger.info("="*60)
+    logger.info("執行模式：常駐排程")
+    logger.info("="*60)
+
+    signal.signal(signal.SIGTERM, _handle_daemon_signal)
+    signal.signal(signal.SIGINT, _handle_daemon_signal)
+
+    jobs = build_daemon_jobs(datetime.now(), **load_daemon_settings())
+    if not jobs:
+        logger.error("沒有啟用任何排程工作（檢查 DAEMON_* 環境變數）")
+        return
+
+    for job in jobs:
+        logger.info(
+            f"  {job['name']}: 每 {job['interval'].total_seconds() / 60:g} 分鐘，"
+            f"首次 {job['next_run'].strftime('%Y-%m-%d %H:%M')}"
+        )
+
+    while not _daemon_stop.is_set():
+        job = min(jobs, key=lambda j: j['next_run'])
+        wait_seconds = (job['next_run'] - datetime.now()).total_seconds()
+        if wait_seconds > 0 and _daemon_stop.wait(wait_seconds):
+            break
+        run_daemon_job(job, jobs)
+
+    logger.info("常駐模式結束")
+
+
 def main():
     """主程式入口"""
     parser = argparse.ArgumentParser(description='政府採購網軟體標案監控')
     parser.add_argument(
         '--mode',
-        choices=['sync', 'report'],
+        choices=['sync', 'poll', 'report', 'daemon'],
         default='sync',
-        help='執行模式: sync(同步資料), report(生成日報)'
+        help='執行模式: sync(同步資料), poll(快速輪詢最近幾天新案), report(生成日報), daemon(常駐並依排程執行)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=f'sync 模式：接續 {SYNC_RESUME_MAX_AGE_HOURS} 小時內中斷的同步（已掃描的日期與已儲存的新案不再重新查詢）'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        metavar='SECONDS',
+        help='sync 模式：執行時間上限（秒），詳細資料依急迫程度查詢，用盡時略過的新案下次優先處理'
+    )
+    parser.add_argument(
+        '--formats',
+        type=lambda value: [fmt.strip() for fmt in value.split(',') if fmt.strip()],
+        help=f"日報輸出格式，以逗號分隔（可用: {', '.join(report_formats.EMITTERS)}；預設: {','.join(REPORT_FORMATS)}）"
+    )
+
+    parser.add_argument(
+        '--since',
+        type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+        help='report 模式：重建自此日期（YYYY-MM-DD）起的歷史日報'
+    )
+    parser.add_argument(
+        '--until',
+        type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+        help='report 模式：重建歷史日報的結束日期（YYYY-MM-DD，預設今天）'
     )
 
     args = parser.parse_args()
 
+    # 程式結束前確保 WAL 已寫回 tenders.db（GitHub Actions 只上傳主資料庫檔）；
+    # 只在主程式註冊，其他工具 import monitor 時不會在結束時等待寫入鎖
+    atexit.register(close_db)
+
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error('--time-budget 必須大於 0')
+    if args.until and not args.since:
+        parser.error('--until 需搭配 --since 使用')
+    if args.since and args.until and args.since > args.until:
+        parser.error('--since 不可晚於 --until')
+
     # 初始化資料庫
     init_db()
 
     # 根據模式執行對應功能
     if args.mode == 'sync':
-        sync_mode()
+        sync_mode(resume=args.resume, time_budget=args.time_budget)
+    elif args.mode == 'poll':
+        sync_mode(time_budget=args.time_budget, days_to_search=QUICK_MODE_DAYS)
+    elif args.mode == 'daemon':
+        daemon_mode()
     elif args.mode == 'report':
-        report_mode()
+        unknown = [fmt for fmt in (args.formats or REPORT_FORMATS) if fmt not in report_formats.EMITTERS]
+        if unknown:
+            logger.error(f"未知的日報格式: {', '.join(unknown)}")
+            sys.exit(1)
+        report_mode(args.formats, args.since, args.until)
     else:
         logger.error(f"未知模式: {args.mode}")
         sys.exit(1)
@@ -3,20 +3,26 @@
 標案查詢工具
 - 查詢資料庫內的標案
 - 支援多種篩選條件
-- 可匯出 CSV
-- 智能推薦分析
+- 全文檢索（FTS5 trigram，含歸檔標案，依相關度排序）
+- 串流匯出 CSV / JSON Lines（分批讀取，可匯出整個歸檔表）
+- --limit / --after keyset 分頁
+- 智能推薦分析（同步時預先計算評分，可依評分排序與篩選）
 """
 
 import sqlite3
 import argparse
+import base64
+import binascii
 import csv
-import requests
-import time
+import itertools
+import json
+import re
 import logging
-import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from monitor import SEARCH_SOURCES, get_db, to_epoch
+
 # ===== 日誌系統設定 =====
 
 # 建立 logs 目錄
@@ -39,198 +45,362 @@ console_handler.setFormatter(formatter)
 
 logger.addHandler(console_handler)
 
-# ===== 配置 =====
+# ===== 全文檢索設定 =====
 
-DB_PATH = "tenders.db"
-API_BASE_URL = os.getenv("PCC_API_BASE_URL", "https://morning-pine-2053.alexabc.workers.dev/api")
-API_TIMEOUT = 15
+# trigram 分詞至少 3 個字才有索引可查，較短的詞（如「系統」）改以子字串比對
+FTS_MIN_TERM_LENGTH = 3
 
+# --match 預設比對的欄位
+SEARCH_COLUMNS = ('brief', 'unit_name', 'qualification_summary')
 
-def get_tender_full_detail(unit_id, job_number):
-    """取得標案完整詳細資訊"""
-    try:
-        time.sleep(0.3)  # 避免 rate limiting
+_MATCH_TOKEN = re.compile(r'\s*(?:"((?:[^"]|"")*)"|([()])|([^\s()"]+))')
+
+# ===== 查詢結果與匯出設定 =====
+
+# 查詢結果每列的欄位（archived 為 1 表示來自歸檔表）
+TENDER_COLUMNS = ('unit_id', 'job_number', 'brief', 'unit_name', 'budget', 'pk_pms_main', 'deadline', 'date_added',
+                  'score', 'archived')
+
+# 串流匯出時每次 fetchmany 的筆數
+EXPORT_BATCH_SIZE = 500
+
+# 以 JSON Lines 匯出的副檔名，其餘一律匯出 CSV
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+DETAIL_URL_TEMPLATE = "https://web.pcc.gov.tw/tps/QueryTender/query/searchTenderDetail?pkPmsMain={pk_pms_main}"
+
+
+# ===== 全文檢索查詢式 =====
+
+def parse_match_expression(expression):
+    """
+    解析 --match 查詢式，回傳語法樹
+
+    - 詞以空白分隔，相鄰的詞視為 AND；含空白或保留字的詞以雙引號包住
+    - 運算子 AND / OR / NOT（大寫），NOT 為二元運算「a NOT b」，可用括號分組
+    - 優先順序 NOT > AND > OR（與 FTS5 相同）
+
+    語法樹節點：('term', 詞) 或 (運算子, 左, 右)
+
+    Raises:
+        ValueError: 查詢式語法錯誤
+    """
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        match = _MATCH_TOKEN.match(expression, pos)
+        if not match:
+            if expression[pos:].strip():
+                raise ValueError(f"查詢式語法錯誤（未閉合的引號）: {expression[pos:].strip()}")
+            break
+        quoted, paren, word = match.groups()
+        if quoted is not None:
+            tokens.append(('term', quoted.replace('""', '"')))
+        elif paren:
+            tokens.append((paren,))
+        elif word in ('AND', 'OR', 'NOT'):
+            tokens.append((word,))
+        else:
+            tokens.append(('term', word))
+        pos = match.end()
+
+    def peek():
+        return tokens[0][0] if tokens else None
+
+    def parse_or():
+        node = parse_and()
+        while peek() == 'OR':
+            tokens.pop(0)
+            node = ('OR', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() in ('AND', 'term', '('):
+            if peek() == 'AND':
+                tokens.pop(0)
+            node = ('AND', node, parse_not())
+        return node
+
+    def parse_not():
+        node = parse_primary()
+        while peek() == 'NOT':
+            tokens.pop(0)
+            node = ('NOT', node, parse_primary())
+        return node
+
+    def parse_primary():
+        if not tokens:
+            raise ValueError(f"查詢式不完整: {expression}")
+        token = tokens.pop(0)
+        if token[0] == 'term':
+            return token
+        if token[0] == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f"查詢式缺少右括號: {expression}")
+            tokens.pop(0)
+            return node
+        raise ValueError(f"查詢式語法錯誤（{token[0]} 位置不正確）: {expression}")
+
+    node = parse_or()
+    if tokens:
+        raise ValueError(f"查詢式語法錯誤（{tokens[0][-1]} 位置不正確）: {expression}")
+    return node
+
+
+def _match_terms(node):
+    """列出語法樹中所有的詞"""
+    if node[0] == 'term':
+        return [node[1]]
+    return _match_terms(node[1]) + _match_terms(node[2])
+
+
+def compile_search(node, columns=SEARCH_COLUMNS):
+    """
+    將查詢式語法樹轉為 SQL 條件
 
-        url = f"{API_BASE_URL}/tender"
-        params = {'unit_id': unit_id, 'job_number': job_number}
+    所有詞都夠長時轉為 FTS5 MATCH 查詢字串（走索引、可依 bm25 排序）；
+    只要有一個詞短於 FTS_MIN_TERM_LENGTH，整個查詢式改以子字串比對 tender_search 的欄位
+    （不分大小寫，同 LIKE '%詞%'）。不直接用 LIKE：單欄 LIKE 會交給 trigram 索引處理，
+    部分 SQLite 版本對短於 3 字的樣式查無結果。
 
-        response = requests.get(url, params=params, timeout=API_TIMEOUT)
-        response.raise_for_status()
+    Returns:
+        tuple: (fts_query, like_sql, like_params)，fts_query 與 like_sql 恰有一個不為 None
+    """
+    if all(len(term) >= FTS_MIN_TERM_LENGTH for term in _match_terms(node)):
+        column_filter = '' if columns == SEARCH_COLUMNS else '{' + ' '.join(columns) + '} : '
+
+        def to_fts(n):
+            if n[0] == 'term':
+                return column_filter + '"' + n[1].replace('"', '""') + '"'
+            return f"({to_fts(n[1])} {n[0]} {to_fts(n[2])})"
+
+        return to_fts(node), None, []
+
+    params = []
+
+    def to_like(n):
+        if n[0] == 'term':
+            params.extend([n[1].lower()] * len(columns))
+            return '(' + ' OR '.join(f"instr(lower(s.{column}), ?) > 0" for column in columns) + ')'
+        if n[0] == 'NOT':
+            return f"({to_like(n[1])} AND NOT {to_like(n[2])})"
+        return f"({to_like(n[1])} {n[0]} {to_like(n[2])})"
 
-        data = response.json()
-        if 'records' in data and len(data['records']) > 0:
-            return data['records'][0].get('detail', {})
+    return None, to_like(node), params
 
-        return None
-    except requests.exceptions.Timeout:
-        logger.warning(f"查詢標案詳細資料超時: {unit_id}/{job_number}")
-        return None
-    except Exception as e:
-        logger.warning(f"查詢標案詳細資料失敗: {e}")
-        return None
 
+# ===== 查詢與分頁 =====
 
-def analyze_tender(brief, budget, unit_name, detail=None):
+def _order_keys(sort):
     """
-    分析標案並評分
-    回傳：{
-        'difficulty': int (1-10),
-        'competition': int (1-10),
-        'beginner_friendly': str ('🟢', '🟡', '🔴'),
-        'win_chance': str,
-        'recommendation': str,
-        'reasons': list,
-        'warnings': list,
-        'score': float
-    }
+    排序鍵 [(欄位, 方向)]，最後以標案代碼與來源打破平手，確保分頁順序穩定
+
+    keyset 條件以 = / < / > 比較，排序鍵不可為 NULL（score_key、sort_ts 在查詢中以 COALESCE 補值）。
+    """
+    primary = ("score_key", "DESC") if sort == 'score' else ("relevance", "ASC")
+    return [primary, ("sort_ts", "DESC"), ("unit_id", "ASC"), ("job_number", "ASC"), ("archived", "ASC")]
+
+
+def _keyset_condition(order_keys, after):
+    """產生「排在 after 之後」的條件：(k1 > a1) OR (k1 = a1 AND k2 > a2) OR ..."""
+    clauses = []
+    params = []
+    for i, (column, direction) in enumerate(order_keys):
+        op = '<' if direction == 'DESC' else '>'
+        terms = [f"{prev} = ?" for prev, _ in order_keys[:i]] + [f"{column} {op} ?"]
+        clauses.append(f"({' AND '.join(terms)})")
+        params.extend(after[:i + 1])
+    return ' OR '.join(clauses), params
+
+
+def encode_page_token(keys):
+    """將最後一筆的排序鍵編碼為 --after 分頁標記"""
+    return base64.urlsafe_b64encode(json.dumps(list(keys)).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token, sort):
+    """
+    解碼 --after 分頁標記
+
+    Raises:
+        ValueError: 標記格式錯誤或與排序方式不符
     """
-    analysis = {
-        'difficulty': 5,
-        'competition': 5,
-        'beginner_friendly': '🟡',
-        'win_chance': '中等',
-        'recommendation': '可考慮',
-        'reasons': [],
-        'warnings': [],
-        'score': 5.0
-    }
-
-    # 預算分析
-    if budget < 300000:
-        analysis['difficulty'] = 3
-        analysis['reasons'].append('預算小，風險低')
-    elif budget < 600000:
-        analysis['difficulty'] = 5
-        analysis['reasons'].append('預算適中')
-    elif budget < 1000000:
-        analysis['difficulty'] = 7
-        analysis['warnings'].append('預算較高，需謹慎評估')
-    else:
-        analysis['difficulty'] = 9
-        analysis['warnings'].append('大型專案，建議有經驗再接')
-
-    # 標案類型分析
-    if '維護' in brief or '維運' in brief:
-        analysis['difficulty'] -= 1
-        analysis['reasons'].append('維護類案件，需求明確')
-    elif '建置' in brief or '開發' in brief:
-        analysis['difficulty'] += 1
-        analysis['warnings'].append('建置類案件，需求可能複雜')
-
-    if 'APP' in brief or '網站' in brief:
-        analysis['reasons'].append('常見軟體類型')
-
-    # 機關分析
-    if unit_name and ('學校' in unit_name or '大學' in unit_name):
-        analysis['competition'] -= 1
-        analysis['reasons'].append('學校單位，通常較容易溝通')
-    elif unit_name and ('警察' in unit_name or '軍' in unit_name or '國防' in unit_name):
-        analysis['difficulty'] += 1
-        analysis['warnings'].append('安全要求較高')
-
-    # 詳細資訊分析（如果有）
-    if detail:
-        # 決標方式
-        decision_method = detail.get('招標資料:決標方式', '')
-        if '最有利標' in decision_method:
-            analysis['competition'] -= 2
-            analysis['reasons'].append('最有利標，重品質不只看價格')
-        elif '最低標' in decision_method:
-            analysis['competition'] += 2
-            analysis['warnings'].append('最低標，價格競爭激烈')
-
-        # 招標方式
-        tender_method = detail.get('招標資料:招標方式', '')
-        if '報價單' in tender_method or '企劃書' in tender_method:
-            analysis['difficulty'] -= 1
-            analysis['reasons'].append('簡化招標，文件較簡單')
-
-        # 特殊要求
-        if detail.get('採購資料:本採購是否屬「涉及國家安全」採購', '') == '是':
-            analysis['difficulty'] += 2
-            analysis['warnings'].append('涉及國安，不允許陸資')
-
-    # 計算總分
-    analysis['difficulty'] = max(1, min(10, analysis['difficulty']))
-    analysis['competition'] = max(1, min(10, analysis['competition']))
-
-    # 新手友好度
-    if analysis['difficulty'] <= 4 and analysis['competition'] <= 5:
-        analysis['beginner_friendly'] = '🟢'
-        analysis['recommendation'] = '強烈推薦'
-    elif analysis['difficulty'] <= 6 and analysis['competition'] <= 7:
-        analysis['beginner_friendly'] = '🟡'
-        analysis['recommendation'] = '可以嘗試'
-    else:
-        analysis['beginner_friendly'] = '🔴'
-        analysis['recommendation'] = '建議累積經驗後再接'
-
-    # 得標機會
-    win_score = 10 - analysis['competition']
-    if win_score >= 7:
-        analysis['win_chance'] = '高'
-    elif win_score >= 4:
-        analysis['win_chance'] = '中等'
-    else:
-        analysis['win_chance'] = '低'
-
-    # 綜合評分 (1-10)
-    analysis['score'] = round((11 - analysis['difficulty']) * 0.4 + win_score * 0.6, 1)
-
-    return analysis
-
-
-def query_tenders(days=30, keyword=None, unit=None, min_budget=None, max_budget=None, include_expired=False):
-    """查詢標案"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-
-            # 基本 SQL 查詢
-            sql = "SELECT unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, date_added FROM tenders WHERE 1=1"
-            params = []
-
-            # 日期篩選
-            if days:
-                date_limit = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-                sql += " AND date_added >= ?"
-                params.append(date_limit)
-
-            # 關鍵字篩選
-            if keyword:
-                sql += " AND brief LIKE ?"
-                params.append(f"%{keyword}%")
-
-            # 機關篩選
-            if unit:
-                sql += " AND unit_name LIKE ?"
-                params.append(f"%{unit}%")
-
-            # 預算範圍篩選
-            if min_budget:
-                sql += " AND budget >= ?"
-                params.append(min_budget)
-
-            if max_budget:
-                sql += " AND budget <= ?"
-                params.append(max_budget)
-
-            # 截止日期篩選（預設只顯示未截止的）
-            if not include_expired:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                sql += " AND deadline > ?"
-                params.append(now)
-
-            # 排序：最新的在前
-            sql += " ORDER BY date_added DESC"
-
-            cursor.execute(sql, params)
-            results = cursor.fetchall()
-
-            return results
+        keys = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        raise ValueError(f"分頁標記格式錯誤：{token}")
+    if not isinstance(keys, list) or len(keys) != len(_order_keys(sort)):
+        raise ValueError(f"分頁標記與排序方式不符：{token}")
+    return keys
+
+
+def build_tender_query(days=30, keyword=None, unit=None, min_budget=None, max_budget=None, include_expired=False,
+                       match=None, include_archive=False, min_score=None, sort=None, after=None, limit=None):
+    """
+    組合標案查詢 SQL，回傳 (sql, params, order_keys)
+
+    結果欄位依序為 TENDER_COLUMNS，其後接排序鍵；after 為上一頁最後一筆的排序鍵（keyset 分頁）。
+
+    Raises:
+        ValueError: match 查詢式語法錯誤
+    """
+    searches = []
+    if match:
+        searches.append(compile_search(parse_match_expression(match)))
+    if keyword:
+        searches.append(compile_search(('term', keyword), ('brief',)))
+    if unit:
+        searches.append(compile_search(('term', unit), ('unit_name',)))
+
+    conditions = []
+    params = []
+
+    # 日期篩選
+    if days:
+        date_limit = (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        conditions.append("t.date_added_ts >= ?")
+        params.append(to_epoch(date_limit))
+
+    # 全文檢索：MATCH 查詢字串合併為一個，短詞以子字串比對
+    fts_queries = [fts_query for fts_query, _, _ in searches if fts_query]
+    if fts_queries:
+        conditions.append("s.tender_search MATCH ?")
+        params.append(' AND '.join(f"({fts_query})" for fts_query in fts_queries))
+    for _, like_sql, like_params in searches:
+        if like_sql:
+            conditions.append(like_sql)
+            params.extend(like_params)
+
+    # 預算範圍篩選
+    if min_budget:
+        conditions.append("t.budget >= ?")
+        params.append(min_budget)
+
+    if max_budget:
+        conditions.append("t.budget <= ?")
+        params.append(max_budget)
+
+    # 推薦評分篩選（尚未評分的標案不列入）
+    if min_score is not None:
+        conditions.append("t.score >= ?")
+        params.append(min_score)
+
+    # 截止日期篩選（預設只顯示未截止的）
+    if not include_expired:
+        conditions.append("t.deadline_ts > ?")
+        params.append(to_epoch(datetime.now()))
+
+    # 現行與歸檔標案各一個子查詢，以 UNION ALL 合併
+    relevance = "s.rank" if fts_queries else "0"
+    branches = []
+    branch_params = []
+    for table, parity in SEARCH_SOURCES if include_archive else SEARCH_SOURCES[:1]:
+        if searches:
+            source = f"tender_search s JOIN {table} t ON t.rowid = s.rowid / 2"
+            where = [f"s.rowid % 2 = {parity}"] + conditions
+        else:
+            source = f"{table} t"
+            where = conditions or ["1=1"]
+        branches.append(f"""
+            SELECT t.unit_id, t.job_number, t.brief, t.unit_name, t.budget, t.pk_pms_main, t.deadline, t.date_added,
+                   t.score, {parity} AS archived,
+                   {relevance} AS relevance, COALESCE(t.score, -1) AS score_key,
+                   COALESCE(t.date_added_ts, 0) AS sort_ts
+            FROM {source}
+            WHERE {' AND '.join(where)}
+        """)
+        branch_params.extend(params)
+
+    # 排序：推薦評分（高分在前）或相關度（bm25，越小越相關），其次最新的在前
+    order_keys = _order_keys(sort)
+    sql = "SELECT * FROM (" + " UNION ALL ".join(branches) + ")"
+    if after is not None:
+        keyset_sql, keyset_params = _keyset_condition(order_keys, after)
+        sql += f" WHERE {keyset_sql}"
+        branch_params.extend(keyset_params)
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order_keys)
+    if limit:
+        sql += " LIMIT ?"
+        branch_params.append(limit)
+
+    return sql, branch_params, order_keys
+
+
+def iter_tender_rows(batch_size=EXPORT_BATCH_SIZE, **filters):
+    """
+    以 fetchmany 分批讀取查詢結果，逐筆產生 (row, keys)
+
+    row 為 TENDER_COLUMNS 欄位的 tuple，keys 為該筆的排序鍵（可編碼為下一頁的分頁標記）。
+    記憶體用量只與 batch_size 有關，適合匯出整個歸檔表。filters 同 build_tender_query。
+
+    Raises:
+        ValueError: match 查詢式語法錯誤
+    """
+    sql, params, order_keys = build_tender_query(**filters)
+    width = len(TENDER_COLUMNS)
+
+    try:
+        cursor = get_db().execute(sql, params)
+        key_indexes = [[d[0] for d in cursor.description].index(column) for column, _ in order_keys]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row[:width], tuple(row[i] for i in key_indexes)
     except sqlite3.Error as e:
         logger.error(f"資料庫查詢錯誤: {e}")
-        return []
+
+
+def query_tenders(days=30, keyword=None, unit=None, min_budget=None, max_budget=None, include_expired=False,
+                  match=None, include_archive=False, min_score=None, sort=None, limit=None):
+    """
+    查詢標案
+
+    keyword、unit 分別比對標題與機關，match 為全文檢索查詢式（見 parse_match_expression）。
+    有全文檢索條件時依相關度排序，否則最新的在前；include_archive 時一併查詢歸檔標案。
+    sort='score' 時依同步時預先計算的推薦評分排序（尚未評分者排最後；現行與歸檔結果合併後排序，
+    需一次暫存排序），min_score 篩選評分下限（各來源表走 score 索引）。
+
+    Returns:
+        list: TENDER_COLUMNS 欄位的 tuple（archived 為 1 表示歸檔標案）
+
+    Raises:
+        ValueError: match 查詢式語法錯誤
+    """
+    return [row for row, _ in iter_tender_rows(
+        days=days, keyword=keyword, unit=unit, min_budget=min_budget, max_budget=max_budget,
+        include_expired=include_expired, match=match, include_archive=include_archive,
+        min_score=min_score, sort=sort, limit=limit
+    )]
+
+
+def query_tender_page(limit, after=None, **filters):
+    """
+    查詢一頁標案（keyset 分頁，翻頁成本不隨頁數增加）
+
+    Args:
+        limit: 每頁筆數
+        after: 上一頁回傳的分頁標記，None 表示第一頁
+        filters: 同 query_tenders
+
+    Returns:
+        tuple: (rows, next_token)，已是最後一頁時 next_token 為 None
+
+    Raises:
+        ValueError: 查詢式或分頁標記格式錯誤
+    """
+    after_keys = decode_page_token(after, filters.get('sort')) if after else None
+    rows = []
+    last_keys = None
+    for row, keys in iter_tender_rows(after=after_keys, limit=limit, **filters):
+        rows.append(row)
+        last_keys = keys
+
+    next_token = encode_page_token(last_keys) if len(rows) == limit else None
+    return rows, next_token
 
 
 def print_results(results):
@@ -245,7 +415,7 @@ def print_results(results):
     total_budget = 0
     now = datetime.now()
 
-    for i, (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, date_added) in enumerate(results, 1):
+    for i, (unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, date_added, score, archived) in enumerate(results, 1):
         total_budget += budget
 
         # 格式化日期
@@ -265,13 +435,15 @@ def print_results(results):
         else:
             deadline_status = f"✅ 剩 {days_left} 天"
 
-        logger.info(f"\n【第 {i} 筆】")
+        logger.info(f"\n【第 {i} 筆】{'（已歸檔）' if archived else ''}")
         logger.info(f"標案名稱：{brief}")
         logger.info(f"招標機關：{unit_name}")
         logger.info(f"預算金額：${budget:,} 元")
         logger.info(f"截止時間：{deadline} ({deadline_status})")
         logger.info(f"發現日期：{date_str}")
-        logger.info(f"詳細連結：https://web.pcc.gov.tw/tps/QueryTender/query/searchTenderDetail?pkPmsMain={pk_pms_main}")
+        if score is not None:
+            logger.info(f"推薦評分：{score:.1f} / 10")
+        logger.info(f"詳細連結：{DETAIL_URL_TEMPLATE.format(pk_pms_main=pk_pms_main)}")
         logger.info(f"標案代碼：{unit_id}/{job_number}")
 
     # 統計資訊
@@ -283,37 +455,68 @@ def print_results(results):
     logger.info("=" * 80)
 
 
+# ===== 匯出 =====
+
 def export_csv(results, filename):
-    """匯出 CSV"""
-    if not results:
+    """逐列寫入 CSV（results 可為產生器），回傳匯出筆數"""
+    count = 0
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        writer = csv.writer(csvfile)
+
+        # 寫入標題列
+        writer.writerow(['標案名稱', '招標機關', '預算金額', '截止時間', '發現日期', '推薦評分', '已歸檔', '標案代碼', '詳細連結'])
+
+        # 寫入資料
+        for unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, date_added, score, archived in results:
+            date_str = date_added.split()[0] if ' ' in date_added else date_added
+
+            writer.writerow([
+                brief,
+                unit_name,
+                budget,
+                deadline,
+                date_str,
+                score,
+                '是' if archived else '否',
+                f"{unit_id}/{job_number}",
+                DETAIL_URL_TEMPLATE.format(pk_pms_main=pk_pms_main)
+            ])
+            count += 1
+
+    return count
+
+
+def export_jsonl(results, filename):
+    """逐列寫入 JSON Lines（每行一個標案物件），回傳匯出筆數"""
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        for row in results:
+            record = dict(zip(TENDER_COLUMNS, row))
+            record['archived'] = bool(record['archived'])
+            record['detail_url'] = DETAIL_URL_TEMPLATE.format(pk_pms_main=record['pk_pms_main'])
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+
+    return count
+
+
+def export_results(results, filename):
+    """依副檔名串流匯出（.jsonl / .ndjson 為 JSON Lines，其餘為 CSV），回傳匯出筆數"""
+    results = iter(results)
+    first = next(results, None)
+    if first is None:
         logger.warning("❌ 沒有資料可匯出")
-        return
+        return 0
 
+    exporter = export_jsonl if Path(filename).suffix.lower() in JSONL_SUFFIXES else export_csv
     try:
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.writer(csvfile)
-
-            # 寫入標題列
-            writer.writerow(['標案名稱', '招標機關', '預算金額', '截止時間', '發現日期', '標案代碼', '詳細連結'])
-
-            # 寫入資料
-            for unit_id, job_number, brief, unit_name, budget, pk_pms_main, deadline, date_added in results:
-                date_str = date_added.split()[0] if ' ' in date_added else date_added
-                detail_url = f"https://web.pcc.gov.tw/tps/QueryTender/query/searchTenderDetail?pkPmsMain={pk_pms_main}"
-
-                writer.writerow([
-                    brief,
-                    unit_name,
-                    budget,
-                    deadline,
-                    date_str,
-                    f"{unit_id}/{job_number}",
-                    detail_url
-                ])
-
-        logger.info(f"✅ 已匯出至 {filename}")
+        count = exporter(itertools.chain([first], results), filename)
     except IOError as e:
-        logger.error(f"匯出 CSV 失敗: {e}")
+        logger.error(f"匯出失敗: {e}")
+        return 0
+
+    logger.info(f"✅ 已匯出 {count:,} 筆至 {filename}")
+    return count
 
 
 def main():
@@ -326,9 +529,14 @@ def main():
   python query_tenders.py --days 7                  # 列出最近 7 天
   python query_tenders.py --keyword "系統"          # 搜尋標題含"系統"
   python query_tenders.py --unit "臺北市"           # 搜尋臺北市的標案
+  python query_tenders.py --match "系統 AND (維護 OR 維運) NOT 警察"   # 全文檢索
+  python query_tenders.py --match "資訊系統" --archive --days 0     # 含歸檔標案、不限日期
   python query_tenders.py --min-budget 500000       # 預算 >= 50 萬
+  python query_tenders.py --sort score --min-score 7   # 推薦評分 >= 7，高分在前
   python query_tenders.py --max-budget 1000000      # 預算 <= 100 萬
   python query_tenders.py --export result.csv       # 匯出 CSV
+  python query_tenders.py --archive --days 0 --include-expired --export all.jsonl   # 串流匯出全部（JSON Lines）
+  python query_tenders.py --limit 20                # 每頁 20 筆，依提示以 --after 翻頁
   python query_tenders.py --days 14 --keyword "APP" --export app_tenders.csv
         """
     )
@@ -339,33 +547,66 @@ def main():
                         help='標案標題關鍵字')
     parser.add_argument('--unit', type=str,
                         help='招標機關關鍵字')
+    parser.add_argument('--match', type=str,
+                        help='全文檢索查詢式（標題、機關、資格摘要），支援 AND / OR / NOT 與括號，依相關度排序')
+    parser.add_argument('--archive', action='store_true',
+                        help='一併查詢已歸檔的標案')
     parser.add_argument('--min-budget', type=int,
                         help='最低預算（元）')
     parser.add_argument('--max-budget', type=int,
                         help='最高預算（元）')
+    parser.add_argument('--min-score', type=float,
+                        help='最低推薦評分（1-10，同步時預先計算）')
+    parser.add_argument('--sort', choices=['default', 'score'], default='default',
+                        help='排序方式：default（相關度 / 最新在前）、score（推薦評分高者在前）')
     parser.add_argument('--export', type=str,
-                        help='匯出 CSV 檔案名稱')
+                        help='匯出檔案名稱（.jsonl / .ndjson 為 JSON Lines，其餘為 CSV），串流寫入不在畫面列出')
+    parser.add_argument('--limit', type=int,
+                        help='每頁筆數（keyset 分頁，搭配 --after 翻頁）')
+    parser.add_argument('--after', type=str,
+                        help='分頁標記（上一頁結尾提示的值）')
     parser.add_argument('--include-expired', action='store_true',
                         help='包含已截止的標案（預設只顯示未截止的）')
 
     args = parser.parse_args()
 
-    # 執行查詢
-    results = query_tenders(
+    if args.limit is not None and args.limit <= 0:
+        parser.error("--limit 必須大於 0")
+    if args.after and not args.limit:
+        parser.error("--after 需搭配 --limit 使用")
+
+    filters = dict(
         days=args.days,
         keyword=args.keyword,
         unit=args.unit,
         min_budget=args.min_budget,
         max_budget=args.max_budget,
-        include_expired=args.include_expired
+        include_expired=args.include_expired,
+        match=args.match,
+        include_archive=args.archive,
+        min_score=args.min_score,
+        sort=args.sort
     )
 
-    # 輸出結果
-    print_results(results)
-
-    # 匯出 CSV
-    if args.export and results:
-        export_csv(results, args.export)
+    try:
+        # 匯出：串流寫入檔案，不在畫面逐筆列出
+        if args.export:
+            after = decode_page_token(args.after, args.sort) if args.after else None
+            rows = (row for row, _ in iter_tender_rows(after=after, limit=args.limit, **filters))
+            export_results(rows, args.export)
+            return
+
+        # 分頁列出
+        if args.limit:
+            results, next_token = query_tender_page(args.limit, args.after, **filters)
+            print_results(results)
+            if next_token:
+                logger.info(f"下一頁：--limit {args.limit} --after {next_token}")
+            return
+
+        print_results(query_tenders(**filters))
+    except ValueError as e:
+        logger.error(f"❌ {e}")
 
 
 if __name__ == "__main__":
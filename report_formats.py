@@ -0,0 +1,347 @@
+"""
+日報輸出格式
+- 日報資料模型（由 monitor.build_report_model 產生）只查詢一次，再交給各格式輸出
+- Markdown（提交至 reports/）、單頁靜態 HTML（儀表板）、JSON 快照（程式讀取）
+- 各格式逐段產生內容，寫入時計算雜湊，內容未變更則不覆寫
+
+新增格式：寫一個 emit_xxx(model) 產生器並登錄到 EMITTERS，不需額外的資料庫或 API 查詢。
+"""
+
+import hashlib
+import html
+import json
+import os
+from pathlib import Path
+
+
+# ===== 資料模型 =====
+#
+# model = {
+#     'date': 日報日期 'YYYY-MM-DD',
+#     'generated_at': 生成時間 'HH:MM:SS',
+#     'stat_date': 統計所屬的同步日期,
+#     'stats': {'new_count', 'removed_count', 'active_count'},
+#     'sections': {'high': [標案], 'attention': [標案], 'other': [標案]},
+#     'archived': [{'brief', 'budget', 'reason'}],
+# }
+#
+# 標案 = {'unit_id', 'job_number', 'brief', 'budget', 'deadline', 'days_left', 'unit', 'url',
+#         'tender_type', 'priority', 'exclusion_reason'}
+
+# 區段順序
+SECTION_ORDER = ['high', 'attention', 'other']
+
+
+def tender_count(model):
+    """模型中的活躍標案總數"""
+    return sum(len(model['sections'][priority]) for priority in SECTION_ORDER)
+
+
+def _truncate(text, limit):
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def _days_tag(days_left):
+    """剩餘天數與緊急標示"""
+    if days_left is None:
+        return "未知"
+    if days_left <= 3:
+        return f"剩 {days_left} 天 🔥"
+    if days_left <= 7:
+        return f"剩 {days_left} 天 ⚡"
+    return f"剩 {days_left} 天"
+
+
+# ===== Markdown =====
+
+MARKDOWN_HEADER_TEMPLATE = """# 政府標案監控日報
+
+**日期**: {date}
+**生成時間**: {generated_at}
+
+---
+
+## 📊 統計摘要
+
+- ✨ 今日新增：**{new_count}** 筆
+- 🔄 今日移除：**{removed_count}** 筆
+- 📌 目前追蹤：**{active_count}** 筆活躍標案
+
+---
+
+"""
+
+# 高優先級 / 值得關注共用的單筆標案區塊
+MARKDOWN_TENDER_TEMPLATE = """### {idx}. {brief}
+
+**💰 預算**：${budget:,}
+**⏰ 截止**：{deadline_date}（{days_tag}）
+**🏢 機關**：{unit}
+**🔗 連結**：[查看詳情]({url})
+
+**📋 案件特性**
+{traits}
+---
+
+"""
+
+# priority -> (區段標題, 案件特性)
+MARKDOWN_DETAIL_SECTIONS = {
+    'high': (
+        "## 🔥 高優先級：維護案（預算 ≤ 50萬）\n\n",
+        "- ✅ 類型：年度維護案（重複性高）\n"
+        "- ✅ 適合能力：系統維護/運維\n"
+        "- ✅ 風險評估：低風險，穩定收入\n"
+    ),
+    'attention': (
+        "## ⚡ 值得關注：開發案（預算 ≤ 50萬）\n\n",
+        "- ⚡ 類型：新系統開發\n"
+        "- ⚡ 適合能力：新系統開發\n"
+        "- ⚠️ 風險評估：中風險，有後續維護機會\n"
+    ),
+}
+
+MARKDOWN_OTHERS_HEADER = (
+    "## 📌 其他標案\n\n"
+    "| 標案名稱 | 預算 | 不符原因 | 截止日期 | 連結 |\n"
+    "|---------|------|----------|----------|------|\n"
+)
+MARKDOWN_OTHERS_ROW_TEMPLATE = "| {brief} | ${budget:,} | {exclusion_reason} | {deadline_date} | {link} |\n"
+
+MARKDOWN_ARCHIVED_HEADER = (
+    "## 🔄 今日移除標案\n\n"
+    "| 標案名稱 | 預算 | 移除原因 |\n"
+    "|---------|------|----------|\n"
+)
+MARKDOWN_ARCHIVED_ROW_TEMPLATE = "| {brief} | ${budget:,} | {reason} |\n"
+
+MARKDOWN_FOOTER = "---\n\n*此報告由政府標案監控系統自動生成*\n"
+
+
+def emit_markdown(model):
+    """逐段產生 Markdown 日報（每段皆為完整的行）"""
+    yield MARKDOWN_HEADER_TEMPLATE.format(
+        date=model['date'], generated_at=model['generated_at'], **model['stats']
+    )
+
+    for priority, (heading, traits) in MARKDOWN_DETAIL_SECTIONS.items():
+        tenders = model['sections'][priority]
+        if not tenders:
+            continue
+        yield heading
+        for idx, tender in enumerate(tenders, 1):
+            yield MARKDOWN_TENDER_TEMPLATE.format(
+                idx=idx, brief=tender['brief'], budget=tender['budget'],
+                deadline_date=tender['deadline'][:10], days_tag=_days_tag(tender['days_left']),
+                unit=tender['unit'], url=tender['url'], traits=traits
+            )
+
+    others = model['sections']['other']
+    if others:
+        yield MARKDOWN_OTHERS_HEADER
+        for tender in others:
+            yield MARKDOWN_OTHERS_ROW_TEMPLATE.format(
+                brief=_truncate(tender['brief'], 60), budget=tender['budget'],
+                exclusion_reason=tender['exclusion_reason'],
+                deadline_date=tender['deadline'][:10] if tender['deadline'] else 'N/A',
+                link=f"[查看]({tender['url']})" if tender['url'] else 'N/A'
+            )
+        yield "\n"
+
+    if tender_count(model) == 0:
+        yield "## ✨ 今日新增標案\n\n無新增標案。\n\n"
+
+    if model['archived']:
+        yield MARKDOWN_ARCHIVED_HEADER
+        for tender in model['archived']:
+            yield MARKDOWN_ARCHIVED_ROW_TEMPLATE.format(
+                brief=_truncate(tender['brief'], 50), budget=tender['budget'], reason=tender['reason']
+            )
+        yield "\n"
+    else:
+        yield "## 🔄 今日移除標案\n\n無移除標案。\n\n"
+
+    yield MARKDOWN_FOOTER
+
+
+# ===== HTML =====
+
+HTML_HEADER_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>政府標案監控日報 {date}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem auto; max-width: 72rem; padding: 0 1rem; color: #222; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 2rem; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: .4rem .6rem; text-align: left; vertical-align: top; }}
+th {{ background: #f5f5f5; }}
+td.num {{ text-align: right; white-space: nowrap; }}
+.stats {{ display: flex; gap: 2rem; list-style: none; padding: 0; }}
+.stats strong {{ font-size: 1.5rem; }}
+.urgent {{ color: #c0392b; font-weight: bold; }}
+</style>
+</head>
+<body>
+<h1>政府標案監控日報</h1>
+<p>日期：{date}</p>
+<p class="generated">生成時間：{generated_at}</p>
+<ul class="stats">
+<li>✨ 今日新增 <strong>{new_count}</strong> 筆</li>
+<li>🔄 今日移除 <strong>{removed_count}</strong> 筆</li>
+<li>📌 目前追蹤 <strong>{active_count}</strong> 筆</li>
+</ul>
+"""
+
+HTML_SECTION_TITLES = {
+    'high': "🔥 高優先級：維護案（預算 ≤ 50萬）",
+    'attention': "⚡ 值得關注：開發案（預算 ≤ 50萬）",
+    'other': "📌 其他標案",
+}
+
+HTML_TENDER_HEADER = (
+    "<table>\n<thead><tr><th>標案名稱</th><th>預算</th><th>截止日期</th><th>剩餘</th>"
+    "<th>機關</th><th>不符原因</th></tr></thead>\n<tbody>\n"
+)
+HTML_TENDER_ROW_TEMPLATE = (
+    "<tr><td>{title}</td><td class=\"num\">${budget:,}</td><td>{deadline_date}</td>"
+    "<td class=\"{urgency}\">{days_tag}</td><td>{unit}</td><td>{exclusion_reason}</td></tr>\n"
+)
+HTML_ARCHIVED_HEADER = (
+    "<h2>🔄 今日移除標案</h2>\n<table>\n<thead><tr><th>標案名稱</th><th>預算</th><th>移除原因</th></tr></thead>\n<tbody>\n"
+)
+HTML_ARCHIVED_ROW_TEMPLATE = "<tr><td>{brief}</td><td class=\"num\">${budget:,}</td><td>{reason}</td></tr>\n"
+HTML_TABLE_FOOTER = "</tbody>\n</table>\n"
+HTML_FOOTER = "<p><em>此報告由政府標案監控系統自動生成</em></p>\n</body>\n</html>\n"
+
+
+def emit_html(model):
+    """逐段產生單頁靜態 HTML 日報"""
+    esc = html.escape
+    yield HTML_HEADER_TEMPLATE.format(
+        date=esc(model['date']), generated_at=esc(model['generated_at']), **model['stats']
+    )
+
+    for priority in SECTION_ORDER:
+        tenders = model['sections'][priority]
+        if not tenders:
+            continue
+        yield f"<h2>{HTML_SECTION_TITLES[priority]}（{len(tenders)} 筆）</h2>\n"
+        yield HTML_TENDER_HEADER
+        for tender in tenders:
+            title = esc(tender['brief'])
+            if tender['url']:
+                title = f"<a href=\"{esc(tender['url'])}\">{title}</a>"
+            days_left = tender['days_left']
+            yield HTML_TENDER_ROW_TEMPLATE.format(
+                title=title, budget=tender['budget'],
+                deadline_date=esc((tender['deadline'] or 'N/A')[:10]),
+                urgency='urgent' if days_left is not None and days_left <= 3 else '',
+                days_tag=esc(_days_tag(days_left)), unit=esc(tender['unit'] or ''),
+                exclusion_reason=esc(tender['exclusion_reason'])
+            )
+        yield HTML_TABLE_FOOTER
+
+    if tender_count(model) == 0:
+        yield "<h2>✨ 今日新增標案</h2>\n<p>無新增標案。</p>\n"
+
+    if model['archived']:
+        yield HTML_ARCHIVED_HEADER
+        for tender in model['archived']:
+            yield HTML_ARCHIVED_ROW_TEMPLATE.format(
+                brief=esc(tender['brief']), budget=tender['budget'], reason=esc(tender['reason'] or '')
+            )
+        yield HTML_TABLE_FOOTER
+    else:
+        yield "<h2>🔄 今日移除標案</h2>\n<p>無移除標案。</p>\n"
+
+    yield HTML_FOOTER
+
+
+# ===== JSON =====
+
+def emit_json(model):
+    """產生 JSON 快照（整份以 json.dumps 輸出；生成時間為頂層鍵，縮排後獨立一行，比較內容時忽略）"""
+    snapshot = {
+        'date': model['date'],
+        'generated_at': model['generated_at'],
+        'stat_date': model['stat_date'],
+        'stats': model['stats'],
+        'sections': {priority: model['sections'][priority] for priority in SECTION_ORDER},
+        'archived': model['archived'],
+    }
+    yield json.dumps(snapshot, ensure_ascii=False, indent=2) + "\n"
+
+
+# ===== 格式登錄 =====
+
+# 格式 -> (副檔名, 輸出函式, 比較內容時忽略的行首（每次生成都會變動的行）)
+EMITTERS = {
+    'md': ('.md', emit_markdown, "**生成時間**:"),
+    'html': ('.html', emit_html, '<p class="generated">'),
+    'json': ('.json', emit_json, '  "generated_at":'),
+}
+
+
+# ===== 寫入 =====
+
+def _content_digest(lines, volatile_prefix):
+    """內容雜湊（忽略以 volatile_prefix 開頭的行）"""
+    digest = hashlib.sha256()
+    for line in lines:
+        if not line.startswith(volatile_prefix):
+            digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_if_changed(path, chunks, volatile_prefix):
+    """
+    將內容串流寫入暫存檔並同時計算雜湊，內容與既有檔案相同時捨棄暫存檔
+
+    Args:
+        chunks: 逐段內容（每段皆為完整的行）
+        volatile_prefix: 比較時忽略的行首
+
+    Returns:
+        bool: 是否寫入（內容有變更）
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                for line in chunk.splitlines(keepends=True):
+                    if not line.startswith(volatile_prefix):
+                        digest.update(line.encode('utf-8'))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if path.exists():
+        with open(path, encoding='utf-8') as f:
+            if _content_digest(f, volatile_prefix) == digest.hexdigest():
+                tmp_path.unlink()
+                return False
+
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_report(model, reports_dir, formats):
+    """
+    以同一份模型輸出各格式日報
+
+    Returns:
+        list: [(格式, 檔案路徑, 是否寫入)]
+    """
+    reports_dir = Path(reports_dir)
+    results = []
+    for fmt in formats:
+        suffix, emitter, volatile_prefix = EMITTERS[fmt]
+        path = reports_dir / f"{model['date']}{suffix}"
+        results.append((fmt, path, write_if_changed(path, emitter(model), volatile_prefix)))
+    return results
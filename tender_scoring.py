@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+標案推薦評分
+- analyze_tender：依預算、標題、機關與 /tender detail 評估難度、競爭度與綜合評分
+- 同步時由 monitor.refresh_tender_scores 預先計算並寫入 tenders 表，查詢時不需再取 detail
+- 調整評分規則或權重後請遞增 SCORING_VERSION，下次同步會重新評分全部標案
+"""
+
+# ===== 評分版本 =====
+
+# 已儲存的評分若版本不同即視為過期
+SCORING_VERSION = 1
+
+
+# ===== 評分規則 =====
+
+def analyze_tender(brief, budget, unit_name, detail=None):
+    """
+    分析標案並評分
+    回傳：{
+        'difficulty': int (1-10),
+        'competition': int (1-10),
+        'beginner_friendly': str ('🟢', '🟡', '🔴'),
+        'win_chance': str,
+        'recommendation': str,
+        'reasons': list,
+        'warnings': list,
+        'score': float
+    }
+    """
+    analysis = {
+        'difficulty': 5,
+        'competition': 5,
+        'beginner_friendly': '🟡',
+        'win_chance': '中等',
+        'recommendation': '可考慮',
+        'reasons': [],
+        'warnings': [],
+        'score': 5.0
+    }
+
+    # 預算分析
+    if budget < 300000:
+        analysis['difficulty'] = 3
+        analysis['reasons'].append('預算小，風險低')
+    elif budget < 600000:
+        analysis['difficulty'] = 5
+        analysis['reasons'].append('預算適中')
+    elif budget < 1000000:
+        analysis['difficulty'] = 7
+        analysis['warnings'].append('預算較高，需謹慎評估')
+    else:
+        analysis['difficulty'] = 9
+        analysis['warnings'].append('大型專案，建議有經驗再接')
+
+    # 標案類型分析
+    if '維護' in brief or '維運' in brief:
+        analysis['difficulty'] -= 1
+        analysis['reasons'].append('維護類案件，需求明確')
+    elif '建置' in brief or '開發' in brief:
+        analysis['difficulty'] += 1
+        analysis['warnings'].append('建置類案件，需求可能複雜')
+
+    if 'APP' in brief or '網站' in brief:
+        analysis['reasons'].append('常見軟體類型')
+
+    # 機關分析
+    if unit_name and ('學校' in unit_name or '大學' in unit_name):
+        analysis['competition'] -= 1
+        analysis['reasons'].append('學校單位，通常較容易溝通')
+    elif unit_name and ('警察' in unit_name or '軍' in unit_name or '國防' in unit_name):
+        analysis['difficulty'] += 1
+        analysis['warnings'].append('安全要求較高')
+
+    # 詳細資訊分析（如果有）
+    if detail:
+        # 決標方式
+        decision_method = detail.get('招標資料:決標方式', '')
+        if '最有利標' in decision_method:
+            analysis['competition'] -= 2
+            analysis['reasons'].append('最有利標，重品質不只看價格')
+        elif '最低標' in decision_method:
+            analysis['competition'] += 2
+            analysis['warnings'].append('最低標，價格競爭激烈')
+
+        # 招標方式
+        tender_method = detail.get('招標資料:招標方式', '')
+        if '報價單' in tender_method or '企劃書' in tender_method:
+            analysis['difficulty'] -= 1
+            analysis['reasons'].append('簡化招標，文件較簡單')
+
+        # 特殊要求
+        if detail.get('採購資料:本採購是否屬「涉及國家安全」採購', '') == '是':
+            analysis['difficulty'] += 2
+            analysis['warnings'].append('涉及國安，不允許陸資')
+
+    # 計算總分
+    analysis['difficulty'] = max(1, min(10, analysis['difficulty']))
+    analysis['competition'] = max(1, min(10, analysis['competition']))
+
+    # 新手友好度
+    if analysis['difficulty'] <= 4 and analysis['competition'] <= 5:
+        analysis['beginner_friendly'] = '🟢'
+        analysis['recommendation'] = '強烈推薦'
+    elif analysis['difficulty'] <= 6 and analysis['competition'] <= 7:
+        analysis['beginner_friendly'] = '🟡'
+        analysis['recommendation'] = '可以嘗試'
+    else:
+        analysis['beginner_friendly'] = '🔴'
+        analysis['recommendation'] = '建議累積經驗後再接'
+
+    # 得標機會
+    win_score = 10 - analysis['competition']
+    if win_score >= 7:
+        analysis['win_chance'] = '高'
+    elif win_score >= 4:
+        analysis['win_chance'] = '中等'
+    else:
+        analysis['win_chance'] = '低'
+
+    # 綜合評分 (1-10)
+    analysis['score'] = round((11 - analysis['difficulty']) * 0.4 + win_score * 0.6, 1)
+
+    return analysis